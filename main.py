@@ -1,10 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Response
+
+from src.core import metrics
+from src.core.audit import audit_pipeline
+from src.core.config import settings
+from src.core.profiling import ProfilingMiddleware
+from src.core.tracing import TracingMiddleware, span_exporter
+from src.db.session import async_engine
+from src.modules.auth.repository import password_hash_executor
 from src.modules.auth.router import router as auth_router
+from src.modules.auth.service import token_cache
+from src.modules.tasks.cache import task_cache, task_list_cache
+from src.modules.tasks.events import task_event_broker
 from src.modules.tasks.router import router as task_router
 from src.modules.users.router import router as user_router
 
-app = FastAPI()
+metrics.track_pool(async_engine)
+metrics.track_executor(password_hash_executor)
+metrics.track_audit(audit_pipeline)
+metrics.track_cache("auth_tokens", token_cache)
+metrics.track_cache("tasks", task_cache.backend)
+metrics.track_cache("task_lists", task_list_cache.backend)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    audit_pipeline.start()
+    span_exporter.start()
+    refresher = asyncio.create_task(
+        metrics.refresh_periodically(settings.METRICS_REFRESH_SECONDS)
+    )
+    yield
+    refresher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await refresher
+    await task_event_broker.stop()
+    await audit_pipeline.stop()
+    await span_exporter.stop()
+    password_hash_executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(TracingMiddleware)
 
 
 @app.get("/health")
@@ -12,6 +54,12 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    content, media_type = metrics.render()
+    return Response(content, media_type=media_type)
+
+
 app.include_router(user_router, prefix="/users", tags=["Users"])
 app.include_router(task_router, prefix="/tasks", tags=["Tasks"])
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
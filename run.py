@@ -1,5 +1,9 @@
 #!/usr/bin/env python
 
+import os
+import shutil
+import tempfile
+
 from gunicorn.app.base import BaseApplication
 
 from src.core.config import settings
@@ -27,7 +31,28 @@ class StandaloneApplication(BaseApplication):
         return self.application
 
 
+def prepare_metrics_dir() -> None:
+    """Give the workers a shared, empty directory for their metric samples.
+
+    prometheus_client reads PROMETHEUS_MULTIPROC_DIR when it is first imported, so
+    this has to run before the application or prometheus_client is imported.
+    """
+    path = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "tasks_metrics")
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
 if __name__ == "__main__":
+    prepare_metrics_dir()
+
     import main
 
     # Log startup information
@@ -46,6 +71,7 @@ if __name__ == "__main__":
         "errorlog": "-",
         "loglevel": "info",
         "proc_name": "tasks_api",
+        "child_exit": child_exit,
     }
 
     # Run the application with Gunicorn
@@ -0,0 +1,115 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded in-process LRU cache with per-entry expiration.
+
+    Entries are evicted in least-recently-used order once max_entries is reached,
+    and lazily dropped on read once their time to live has elapsed.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store value under key for ttl seconds (defaults to the cache ttl)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+        }
+
+
+class CacheBackend(ABC):
+    """Async key/value store for serialized values.
+
+    The interface mirrors the subset of Redis commands the application needs, so a
+    shared store can replace the in-process backend without touching callers.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Return the value stored under key, or None."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        """Store value under key, expiring after ttl seconds."""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Remove the given keys, ignoring missing ones."""
+
+    def stats(self) -> dict[str, float]:
+        return {}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """CacheBackend backed by a per-process LRUCache."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.cache: LRUCache[str, bytes] = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    async def get(self, key: str) -> bytes | None:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        self.cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.cache.delete(key)
+
+    def stats(self) -> dict[str, float]:
+        return self.cache.stats()
@@ -0,0 +1,28 @@
+import hashlib
+
+
+def make_etag(content: bytes) -> str:
+    """Build a strong ETag from the encoded body of a response."""
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def parse_etags(header: str | None) -> list[str]:
+    """Split an If-Match / If-None-Match header into its entity tags.
+
+    Weak validators keep their W/ prefix, since If-Match compares tags with the
+    strong comparison function, where a weak tag never matches.
+    """
+    if not header:
+        return []
+    tags = (tag.strip() for tag in header.split(","))
+    return [tag for tag in tags if tag]
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Check whether an If-None-Match header matches the given ETag.
+
+    If-None-Match uses the weak comparison function, so a weak tag matches the
+    strong ETag with the same opaque tag.
+    """
+    tags = [tag.removeprefix("W/") for tag in parse_etags(header)]
+    return "*" in tags or etag in tags
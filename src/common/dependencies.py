@@ -10,5 +10,5 @@ async def get_user_repository(db: AsyncSession = Depends(get_db)) -> UserReposit
     return UserRepository(db=db)
 
 
-async def get_auth_repository() -> AuthRepository:
-    return AuthRepository()
+async def get_auth_repository(db: AsyncSession = Depends(get_db)) -> AuthRepository:
+    return AuthRepository(db=db)
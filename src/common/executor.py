@@ -0,0 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException
+
+from src.core.logging import logger
+from src.core.profiling import timed
+
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """Thread pool for blocking work with a cap on queued jobs.
+
+    Jobs are submitted from the event loop, so the pending counter is only ever
+    touched from a single thread and needs no locking.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Run a blocking callable in the pool without blocking the event loop.
+
+        Args:
+            func (Callable): The blocking callable to run.
+            *args: Positional arguments for the callable.
+
+        Returns:
+            The value returned by the callable.
+
+        Raises:
+            HTTPException: If the pool already has max_pending jobs queued or running.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning(f"{self.name} pool saturated ({self.pending} pending)")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            with timed(self.name):
+                return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
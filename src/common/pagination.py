@@ -1,10 +1,28 @@
-from typing import Generic, TypeVar
+import base64
+import enum
+import json
+from typing import Any, Generic, TypeVar
 
+from fastapi import HTTPException
 from pydantic import BaseModel, ConfigDict, Field
 
 T = TypeVar("T")
 
 
+class CountMode(str, enum.Enum):
+    """How the total number of items of a paginated listing is computed."""
+
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+
+
+class SortDirection(str, enum.Enum):
+    """Direction in which a listing is sorted."""
+
+    ASC = "asc"
+    DESC = "desc"
+
+
 class PaginationParams(BaseModel):
     """Pagination parameters for list endpoints."""
 
@@ -18,20 +36,62 @@ class PaginatedResponse(BaseModel, Generic[T]):
     model_config = ConfigDict(from_attributes=True)
 
     items: list[T]
-    total: int
+    total: int | None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: int | None
 
     @classmethod
     def create(
-        cls, items: list[T], total: int, page: int, page_size: int
+        cls, items: list[T], total: int | None, page: int, page_size: int
     ) -> "PaginatedResponse[T]":
-        """Create a paginated response."""
+        """Create a paginated response, leaving the totals empty if not counted."""
+        total_pages = None
+        if total is not None:
+            total_pages = (total + page_size - 1) // page_size if page_size > 0 else 0
         return cls(
             items=items,
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=(total + page_size - 1) // page_size if page_size > 0 else 0,
+            total_pages=total_pages,
         )
+
+
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    """Generic keyset-paginated response model."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    items: list[T]
+    page_size: int
+    next_cursor: str | None = None
+
+    @classmethod
+    def create(
+        cls, items: list[T], page_size: int, next_cursor: str | None
+    ) -> "CursorPaginatedResponse[T]":
+        """Create a keyset-paginated response."""
+        return cls(items=items, page_size=page_size, next_cursor=next_cursor)
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """Encode the sort key of the last item of a page into an opaque cursor."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """Decode a cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
@@ -0,0 +1,76 @@
+import codecs
+import csv
+from collections.abc import AsyncIterable, AsyncIterator
+
+from fastapi import HTTPException
+
+
+async def read_lines(
+    chunks: AsyncIterable[bytes], max_line_length: int
+) -> AsyncIterator[tuple[int, str]]:
+    """Split a stream of UTF-8 bytes into lines without buffering the whole stream.
+
+    Yields:
+        tuple[int, str]: The 1-based line number and the line, without its ending.
+
+    Raises:
+        HTTPException: If the stream is not UTF-8 or a line is too long.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    number = 0
+    final = False
+    chunks = aiter(chunks)
+    while not final:
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            chunk, final = b"", True
+        try:
+            pending += decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Body is not valid UTF-8")
+        *lines, pending = pending.split("\n")
+        if final and pending:
+            lines.append(pending)
+        for line in lines:
+            number += 1
+            yield number, line.removesuffix("\r")
+        if len(pending) > max_line_length:
+            raise HTTPException(
+                status_code=413, detail=f"Line {number + 1} is too long"
+            )
+
+
+async def read_csv_records(
+    chunks: AsyncIterable[bytes], max_record_length: int
+) -> AsyncIterator[tuple[int, list[str]]]:
+    """Parse a stream of CSV bytes one record at a time.
+
+    Quoted fields may span several lines: a record is complete once it holds an
+    even number of quotes, since quotes inside fields are escaped by doubling them.
+
+    Yields:
+        tuple[int, list[str]]: The line number a record starts on and its fields.
+
+    Raises:
+        HTTPException: If the stream is not UTF-8 or a record is too long.
+    """
+    record: list[str] = []
+    start = 0
+    quotes = 0
+    async for number, line in read_lines(chunks, max_record_length):
+        if not record:
+            start = number
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            if sum(map(len, record)) > max_record_length:
+                raise HTTPException(status_code=413, detail=f"Line {start} is too long")
+            continue
+        text = "\n".join(record)
+        record, quotes = [], 0
+        if text.strip():
+            yield start, next(csv.reader([text]))
+    if record:
+        yield start, next(csv.reader(["\n".join(record)]))
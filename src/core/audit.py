@@ -0,0 +1,148 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from src.core.config import settings
+from src.core.logging import logger
+
+
+class AuditPipeline:
+    """Buffers audit records in memory and writes them out in batches.
+
+    Recording only appends a tuple to a bounded ring buffer; encoding and writing
+    happen in a background task. Once the buffer is full, each new record
+    overwrites the oldest one, which is counted as dropped. Records of reads are
+    kept with probability `read_sample_rate`.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int,
+        batch_size: int,
+        flush_interval: float,
+        read_sample_rate: float,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.read_sample_rate = read_sample_rate
+        self.recorded = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._buffer: deque[tuple[float, str, Any, dict[str, Any]]] = deque(
+            maxlen=buffer_size
+        )
+        self._batch_ready = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def record(
+        self, action: str, actor: Any, read: bool = False, **details: Any
+    ) -> None:
+        """Queue an audit record without blocking.
+
+        Args:
+            action (str): What was done, such as "task.update".
+            actor (Any): Who did it, usually a user id or email.
+            read (bool): Whether the action only reads data, making it subject to
+                sampling.
+            **details: Further fields of the record.
+        """
+        if read and random.random() >= self.read_sample_rate:
+            self.sampled_out += 1
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((time.time(), action, actor, details))
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+
+    def start(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and write out the remaining records."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        self.flush()
+
+    def flush(self) -> None:
+        while self._buffer:
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(self.batch_size, len(self._buffer)))
+            ]
+            try:
+                lines = "\n".join(self._encode(*record) for record in batch)
+                # Routed to the audit file sink, which writes from its own thread
+                logger.bind(AUDIT=True).info(lines)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception(f"Could not write {len(batch)} audit records")
+            else:
+                self.written += len(batch)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "recorded": self.recorded,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "pending": self.pending,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._batch_ready.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            self.flush()
+
+    @staticmethod
+    def _encode(
+        timestamp: float, action: str, actor: Any, details: dict[str, Any]
+    ) -> str:
+        return json.dumps(
+            {
+                "time": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+                "action": action,
+                "actor": actor,
+                **details,
+            },
+            default=str,
+        )
+
+
+audit_pipeline = AuditPipeline(
+    buffer_size=settings.AUDIT_BUFFER_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    read_sample_rate=settings.AUDIT_READ_SAMPLE_RATE,
+)
+
+
+def audit(action: str, actor: Any, read: bool = False, **details: Any) -> None:
+    audit_pipeline.record(action, actor, read, **details)
+
+
+__all__ = ["AuditPipeline", "audit", "audit_pipeline"]
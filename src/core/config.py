@@ -13,6 +13,12 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_ALGORITHM: str = "HS256"
 
+    # Verified token cache settings
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_STATELESS_PRINCIPAL: bool = False
+    AUTH_CHECK_REVOKED_TOKENS: bool = True
+
     # Concurrency settings
     WORKERS_COUNT: int = multiprocessing.cpu_count() * 2 + 1
     WORKER_CLASS: str = "uvicorn.workers.UvicornWorker"
@@ -23,9 +29,61 @@ class Settings(BaseSettings):
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 1800  # 30 minutes
 
+    # Password hashing settings
+    PASSWORD_HASH_WORKERS: int = multiprocessing.cpu_count()
+    PASSWORD_HASH_MAX_PENDING: int = multiprocessing.cpu_count() * 8
+
+    # Task bulk operation settings
+    TASKS_BULK_MAX_ITEMS: int = 1000
+
+    # Task export settings
+    TASKS_EXPORT_BATCH_SIZE: int = 1000
+
+    # Task import settings
+    TASKS_IMPORT_CHUNK_SIZE: int = 1000
+    TASKS_IMPORT_MAX_LINE_LENGTH: int = 65536
+    TASKS_IMPORT_MAX_ERRORS: int = 100  # rows reported in the errors of a summary
+
+    # Task cache settings
+    TASK_CACHE_MAX_ENTRIES: int = 50000
+    TASK_CACHE_TTL_SECONDS: int = 30  # 0 disables the task read cache
+    TASK_LIST_CACHE_MAX_ENTRIES: int = 50000
+    TASK_LIST_CACHE_TTL_SECONDS: int = 10  # 0 disables the task list cache
+
+    # Task events settings
+    TASK_EVENTS_QUEUE_SIZE: int = 100
+    TASK_EVENTS_HEARTBEAT_SECONDS: int = 15
+
+    # Audit settings
+    AUDIT_BUFFER_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_READ_SAMPLE_RATE: float = 1.0  # share of read events that are recorded
+
+    # Metrics settings
+    METRICS_REFRESH_SECONDS: float = 5.0  # how often component gauges are updated
+
+    # Profiling settings
+    PROFILING_TOKEN: str = ""  # sent in X-Profile to get a Server-Timing header
+    PROFILING_SAMPLE_RATE: float = 0.0  # share of requests profiled and logged
+    PROFILING_FLAMEGRAPH_DIR: str = ""  # needs pyinstrument, empty disables
+    PROFILING_SAMPLE_INTERVAL_SECONDS: float = 0.001
+
+    # Tracing settings
+    TRACING_EXPORTER: str = "none"  # "none", "file" or "otlp"
+    TRACING_SAMPLE_RATE: float = 0.01  # share of new traces that are recorded
+    TRACING_SERVICE_NAME: str = "tasks"
+    TRACING_FILE_PATH: str = "logs/traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_BUFFER_SIZE: int = 10000
+    TRACING_BATCH_SIZE: int = 512
+    TRACING_EXPORT_INTERVAL_SECONDS: float = 5.0
+
     # Application configuration
     LOG_LEVEL: str = "INFO"
-    ENVIRONMENT: str = "development"
+    ENVIRONMENT: str = "development"  # "production" logs JSON lines, rate limited
+    LOG_RATE_LIMIT_COUNT: int = 20  # records per call site and window, 0 disables
+    LOG_RATE_LIMIT_WINDOW_SECONDS: float = 60.0
 
 
 # Load settings from environment variables
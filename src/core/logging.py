@@ -1,4 +1,7 @@
+import json
 import sys
+import time
+import traceback
 from pathlib import Path
 
 from loguru import logger
@@ -8,43 +11,124 @@ from src.core.config import settings
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 
-logger.remove()
+PRODUCTION = settings.ENVIRONMENT == "production"
 
-logger.add(
-    sys.stdout,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-    "<level>{level: <8}</level> | "
-    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
-    "<level>{message}</level>",
-    level=settings.LOG_LEVEL,
-    backtrace=True,
-    diagnose=True,
-    enqueue=True,
-)
 
-logger.add(
-    LOG_DIR / "errors.log",
-    rotation="10 MB",
-    retention="10 days",
-    level="ERROR",
-    backtrace=True,
-    diagnose=True,
-    enqueue=True,
-    compression="zip",
-)
+class RateLimitFilter:
+    """Let through at most `limit` records per call site in each time window.
+
+    Keying on the call site rather than the message groups the records a scan
+    produces with a different id each time. The first record of a new window
+    reports how many were suppressed in the previous one.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._sites: dict[tuple[str, int], list] = {}
 
+    def __call__(self, record) -> bool:
+        if "AUDIT" in record["extra"]:
+            return False
+        if self.limit <= 0:
+            return True
+        now = time.monotonic()
+        site = (record["name"], record["line"])
+        state = self._sites.get(site)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            self._sites[site] = [now, 1, 0]
+            if suppressed:
+                record["extra"]["suppressed"] = suppressed
+            return True
+        if state[1] < self.limit:
+            state[1] += 1
+            return True
+        state[2] += 1
+        return False
+
+
+def json_format(record) -> str:
+    """Format a record as a compact JSON line, without inspecting variables."""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": f"{record['name']}:{record['function']}:{record['line']}",
+        "message": record["message"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if key != "json"}
+    if extra:
+        entry.update(extra)
+    if record["exception"] is not None:
+        error_type, error, tb = record["exception"]
+        entry["exception"] = "".join(traceback.format_exception(error_type, error, tb))
+    record["extra"]["json"] = json.dumps(entry, default=str)
+    return "{extra[json]}\n"
+
+
+logger.remove()
+
+if PRODUCTION:
+    # Each sink keeps its own counts, since a filter sees every record it is given
+    logger.add(
+        sys.stdout,
+        format=json_format,
+        level=settings.LOG_LEVEL,
+        filter=RateLimitFilter(
+            settings.LOG_RATE_LIMIT_COUNT, settings.LOG_RATE_LIMIT_WINDOW_SECONDS
+        ),
+        backtrace=False,
+        diagnose=False,
+        enqueue=True,
+    )
+    logger.add(
+        LOG_DIR / "errors.log",
+        rotation="10 MB",
+        retention="10 days",
+        format=json_format,
+        level="ERROR",
+        filter=RateLimitFilter(
+            settings.LOG_RATE_LIMIT_COUNT, settings.LOG_RATE_LIMIT_WINDOW_SECONDS
+        ),
+        backtrace=False,
+        diagnose=False,
+        enqueue=True,
+        compression="zip",
+    )
+else:
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+        "<level>{level: <8}</level> | "
+        "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+        "<level>{message}</level>",
+        level=settings.LOG_LEVEL,
+        filter=lambda record: "AUDIT" not in record["extra"],
+        backtrace=True,
+        diagnose=True,
+        enqueue=True,
+    )
+    logger.add(
+        LOG_DIR / "errors.log",
+        rotation="10 MB",
+        retention="10 days",
+        level="ERROR",
+        backtrace=True,
+        diagnose=True,
+        enqueue=True,
+        compression="zip",
+    )
+
+# Receives batches of JSON lines from src.core.audit
 logger.add(
     LOG_DIR / "audit.log",
     rotation="5 MB",
     retention="30 days",
     level="INFO",
+    format="{message}",
     filter=lambda record: "AUDIT" in record["extra"],
     enqueue=True,
 )
 
 
-def audit(message: str, **kwargs):
-    logger.bind(AUDIT=True).info(message, **kwargs)
-
-
-__all__ = ["logger", "audit"]
+__all__ = ["logger"]
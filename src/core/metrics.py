@@ -0,0 +1,241 @@
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.common.cache import CacheBackend, LRUCache
+from src.core import profiling
+from src.core.logging import logger
+
+# When run.py starts gunicorn, PROMETHEUS_MULTIPROC_DIR is set before this module
+# is imported, so every worker writes its samples to files that /metrics merges.
+# Gauges are summed over the live workers.
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests served", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve an HTTP request, including streamed bodies",
+    ["method", "route"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Time to execute a SQL statement", ["operation"]
+)
+DB_POOL_CHECKOUT_DURATION = Histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time to check a connection out of the pool, including waiting for one",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Database pool connections by state",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+EXECUTOR_PENDING = Gauge(
+    "executor_pending_jobs",
+    "Jobs queued or running on a bounded thread pool",
+    ["executor"],
+    multiprocess_mode="livesum",
+)
+EXECUTOR_REJECTED = Counter(
+    "executor_rejected_jobs_total",
+    "Jobs refused by a saturated bounded thread pool",
+    ["executor"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Cache lookups by result", ["cache", "result"]
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total", "Entries evicted to make room", ["cache"]
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries", "Entries held in a cache", ["cache"], multiprocess_mode="livesum"
+)
+AUDIT_RECORDS = Counter("audit_records_total", "Audit records by outcome", ["outcome"])
+AUDIT_PENDING = Gauge(
+    "audit_pending_records",
+    "Audit records waiting to be written",
+    multiprocess_mode="livesum",
+)
+
+QUERY_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "EXPLAIN"}
+
+# Components keep plain counters on their hot paths; these callbacks copy them
+# into the metrics before each scrape and periodically in every worker
+_refreshers: list[Callable[[], None]] = []
+
+
+class MetricsMiddleware:
+    """Record the count, latency and concurrency of HTTP requests by route."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            # The route template keeps ids out of the labels
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_DURATION.labels(method, path).observe(
+                time.perf_counter() - start
+            )
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every SQL statement executed through an engine, for metrics and profiles."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper()
+        if operation not in QUERY_OPERATIONS:
+            operation = "OTHER"
+        elapsed = time.perf_counter() - start
+        DB_QUERY_DURATION.labels(operation).observe(elapsed)
+        profiling.record("db", elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def discard_query(context):
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+
+def _counter_refresher(
+    counter: Counter, labels: tuple[str, ...], read: Callable[[], int]
+) -> Callable[[], None]:
+    """Advance a counter by the growth of a plain counter since the last call."""
+    last = 0
+
+    def refresh() -> None:
+        nonlocal last
+        value = read()
+        if value > last:
+            counter.labels(*labels).inc(value - last)
+        last = value
+
+    return refresh
+
+
+def track_pool(engine: AsyncEngine) -> None:
+    """Export the connections of an engine's pool by state."""
+    pool: Any = engine.sync_engine.pool
+
+    def refresh() -> None:
+        DB_POOL_CONNECTIONS.labels("checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels("idle").set(pool.checkedin())
+        # overflow() counts up from -pool_size until the pool is full
+        DB_POOL_CONNECTIONS.labels("overflow").set(max(pool.overflow(), 0))
+
+    _refreshers.append(refresh)
+
+
+def track_cache(name: str, cache: LRUCache[Any, Any] | CacheBackend) -> None:
+    """Export the hits, misses, evictions and size reported by a cache's stats."""
+
+    def stat(key: str) -> Callable[[], int]:
+        return lambda: int(cache.stats().get(key, 0))
+
+    _refreshers.extend(
+        [
+            _counter_refresher(CACHE_LOOKUPS, (name, "hit"), stat("hits")),
+            _counter_refresher(CACHE_LOOKUPS, (name, "miss"), stat("misses")),
+            _counter_refresher(CACHE_EVICTIONS, (name,), stat("evictions")),
+            lambda: CACHE_ENTRIES.labels(name).set(stat("entries")()),
+        ]
+    )
+
+
+def track_executor(executor: Any) -> None:
+    """Export the queue depth and rejections of a BoundedExecutor."""
+    _refreshers.extend(
+        [
+            lambda: EXECUTOR_PENDING.labels(executor.name).set(executor.pending),
+            _counter_refresher(
+                EXECUTOR_REJECTED, (executor.name,), lambda: executor.rejected
+            ),
+        ]
+    )
+
+
+def track_audit(pipeline: Any) -> None:
+    """Export the record counts of an AuditPipeline."""
+    for outcome in ["recorded", "sampled_out", "dropped", "written", "failed"]:
+        _refreshers.append(
+            _counter_refresher(
+                AUDIT_RECORDS, (outcome,), partial(getattr, pipeline, outcome)
+            )
+        )
+    _refreshers.append(lambda: AUDIT_PENDING.set(pipeline.pending))
+
+
+def refresh() -> None:
+    for refresher in _refreshers:
+        refresher()
+
+
+async def refresh_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            refresh()
+        except Exception:
+            logger.exception("Could not refresh metrics")
+
+
+def render() -> tuple[bytes, str]:
+    """Encode the metrics of all workers in the Prometheus text format."""
+    refresh()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
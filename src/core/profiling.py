@@ -0,0 +1,216 @@
+import asyncio
+import functools
+import hmac
+import random
+import re
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.logging import logger
+
+Sampler: Any
+try:
+    from pyinstrument import Profiler as Sampler
+except ImportError:  # flamegraphs are optional
+    Sampler = None
+
+
+class Profile:
+    """Time spent in each part of a single request.
+
+    Durations are in seconds and keyed by Server-Timing metric name. Code outside
+    a profiled request never sees a Profile, so the hooks below cost one context
+    variable lookup on the normal path.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.durations: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.route_start = self.start
+        self.endpoint_end: float | None = None
+
+    def add(self, name: str, duration: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def server_timing(self) -> str:
+        metrics = []
+        for name, duration in self.durations.items():
+            metric = f"{name};dur={duration * 1000:.1f}"
+            if self.counts[name] > 1:
+                metric += f';desc="{self.counts[name]} calls"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+
+current_profile: ContextVar[Profile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def record(name: str, duration: float) -> None:
+    """Add a measured duration to the current request's profile, if any."""
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add(name, duration)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Time a block into the current request's profile, if any."""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that splits a profiled request into dependencies, endpoint and
+    serialization.
+
+    `deps` covers request parsing, validation and dependency resolution,
+    `endpoint` the endpoint body, and `serialize` validating and encoding what
+    the endpoint returned.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request: Request) -> Response:
+            profile = current_profile.get()
+            if profile is None:
+                return await handler(request)
+            profile.route_start = time.perf_counter()
+            response = await handler(request)
+            if profile.endpoint_end is not None:
+                profile.add("serialize", time.perf_counter() - profile.endpoint_end)
+            return response
+
+        return profiled_handler
+
+
+def _profiled_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # include_router builds new routes around endpoints that are already wrapped
+    if not asyncio.iscoroutinefunction(endpoint) or hasattr(endpoint, "__profiled__"):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def profiled_endpoint(*args: Any, **kwargs: Any) -> Any:
+        profile = current_profile.get()
+        if profile is None:
+            return await endpoint(*args, **kwargs)
+        start = time.perf_counter()
+        profile.add("deps", start - profile.route_start)
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            profile.endpoint_end = time.perf_counter()
+            profile.add("endpoint", profile.endpoint_end - start)
+
+    profiled_endpoint.__profiled__ = True  # type: ignore[attr-defined]
+    return profiled_endpoint
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry the profiling token or are sampled.
+
+    A request sending `X-Profile: <PROFILING_TOKEN>` gets its breakdown back in a
+    Server-Timing header. A share of PROFILING_SAMPLE_RATE of all requests is
+    profiled as well and the breakdown is logged instead, so timings are only
+    disclosed to holders of the token. With PROFILING_FLAMEGRAPH_DIR set and
+    pyinstrument installed, each profiled request also writes a flamegraph there.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = _requested(scope)
+        if not requested and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile()
+        sampler = _start_sampler()
+
+        async def send_with_timing(message: Message) -> None:
+            # Streamed bodies are sent after this, so they are not included
+            if message["type"] == "http.response.start":
+                profile.add("total", time.perf_counter() - profile.start)
+                timing = profile.server_timing()
+                if requested:
+                    MutableHeaders(scope=message).append("Server-Timing", timing)
+                else:
+                    logger.info(f"Profiled {scope['method']} {_route(scope)}: {timing}")
+            await send(message)
+
+        reset_token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(reset_token)
+            if sampler is not None:
+                sampler.stop()
+                await asyncio.to_thread(_write_flamegraph, sampler, scope)
+
+
+def _requested(scope: Scope) -> bool:
+    expected = settings.PROFILING_TOKEN
+    if not expected:
+        return False
+    token = Headers(scope=scope).get("x-profile")
+    # Header values are decoded as latin-1, and compare_digest only takes ASCII str
+    return token is not None and hmac.compare_digest(
+        token.encode("latin-1"), expected.encode()
+    )
+
+
+def _route(scope: Scope) -> str:
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+def _start_sampler() -> Any:
+    if not settings.PROFILING_FLAMEGRAPH_DIR:
+        return None
+    if Sampler is None:
+        logger.warning("PROFILING_FLAMEGRAPH_DIR is set but pyinstrument is missing")
+        return None
+    sampler = Sampler(interval=settings.PROFILING_SAMPLE_INTERVAL_SECONDS)
+    sampler.start()
+    return sampler
+
+
+def _write_flamegraph(sampler: Any, scope: Scope) -> None:
+    route = re.sub(r"[^A-Za-z0-9]+", "_", _route(scope)).strip("_") or "root"
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{route}"
+    directory = Path(settings.PROFILING_FLAMEGRAPH_DIR)
+    path = directory / f"{name}-{uuid.uuid4().hex[:8]}.html"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        path.write_text(sampler.output_html())
+    except OSError:
+        logger.exception(f"Could not write flamegraph {path}")
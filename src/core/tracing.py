@@ -0,0 +1,431 @@
+import asyncio
+import functools
+import inspect
+import json
+import os
+import re
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, TypeVar
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.logging import logger
+
+T = TypeVar("T")
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+INVALID_TRACE_ID = "0" * 32
+INVALID_SPAN_ID = "0" * 16
+MAX_STATEMENT_LENGTH = 2048
+
+
+class SpanKind(IntEnum):
+    """OTLP span kinds."""
+
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+
+
+class Span:
+    """A timed operation within a trace, encoded as OTLP JSON on export."""
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_time",
+        "end_time",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: str | None,
+        kind: SpanKind = SpanKind.INTERNAL,
+        attributes: dict[str, Any] | None = None,
+    ):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_time = time.time_ns()
+        self.end_time = 0
+        self.error: str | None = None
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.attributes["exception.type"] = type(exc).__name__
+        # Expected client errors are part of normal operation
+        if not (isinstance(exc, HTTPException) and exc.status_code < 500):
+            self.error = str(exc) or type(exc).__name__
+
+    def end(self) -> None:
+        self.end_time = time.time_ns()
+        span_exporter.record(self)
+
+    def encode(self) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": int(self.kind),
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": _encode_attributes(self.attributes),
+            "status": {"code": 2, "message": self.error} if self.error else {},
+        }
+        if self.parent_span_id is not None:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _encode_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        encoded_value: dict[str, Any]
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
+
+
+class SpanExporter:
+    """Buffers finished spans and exports them in OTLP JSON batches.
+
+    Ending a span only appends it to a bounded ring buffer, like the audit
+    pipeline; a background task sends batches either to a file, one
+    ExportTraceServiceRequest per line, or to an OTLP/HTTP collector. Spans that
+    do not fit in the buffer are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        exporter: str,
+        file_path: str,
+        endpoint: str,
+        service_name: str,
+        buffer_size: int,
+        batch_size: int,
+        flush_interval: float,
+    ):
+        self.exporter = exporter
+        self.file_path = file_path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+        self._buffer: deque[Span] = deque(maxlen=buffer_size)
+        self._batch_ready = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter != "none"
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def record(self, span: Span) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(span)
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background exporter and export the remaining spans."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def flush(self) -> None:
+        while self._buffer:
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(self.batch_size, len(self._buffer)))
+            ]
+            try:
+                await self._export(self._encode(batch))
+            except Exception:
+                self.failed += len(batch)
+                logger.exception(f"Could not export {len(batch)} spans")
+            else:
+                self.exported += len(batch)
+
+    async def _export(self, request: dict[str, Any]) -> None:
+        body = json.dumps(request, separators=(",", ":"))
+        if self.exporter == "file":
+            await asyncio.to_thread(self._append, body)
+        elif self.exporter == "otlp":
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=10)
+            response = await self._client.post(
+                self.endpoint,
+                content=body,
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+
+    def _append(self, body: str) -> None:
+        path = Path(self.file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a") as file:
+            file.write(body + "\n")
+
+    def _encode(self, spans: list[Span]) -> dict[str, Any]:
+        resource = _encode_attributes({"service.name": self.service_name})
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": resource},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "src.core.tracing"},
+                            "spans": [span.encode() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._batch_ready.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+
+
+span_exporter = SpanExporter(
+    exporter=settings.TRACING_EXPORTER,
+    file_path=settings.TRACING_FILE_PATH,
+    endpoint=settings.TRACING_OTLP_ENDPOINT,
+    service_name=settings.TRACING_SERVICE_NAME,
+    buffer_size=settings.TRACING_BUFFER_SIZE,
+    batch_size=settings.TRACING_BATCH_SIZE,
+    flush_interval=settings.TRACING_EXPORT_INTERVAL_SECONDS,
+)
+
+# Only set while a sampled request is being served, so unsampled requests skip
+# span creation after a single lookup
+current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: SpanKind = SpanKind.INTERNAL,
+    attributes: dict[str, Any] | None = None,
+) -> Iterator[Span | None]:
+    """Run a block in a child span of the current span, if the trace is sampled."""
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(name, parent.trace_id, parent.span_id, kind, attributes)
+    reset_token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        raise
+    finally:
+        current_span.reset(reset_token)
+        span.end()
+
+
+def traced(cls: type[T]) -> type[T]:
+    """Class decorator giving each public coroutine method its own span.
+
+    Used on services and repositories, so a trace shows how long each layer
+    took. Async generators are left alone, as their spans would stay open for
+    as long as the caller keeps iterating.
+    """
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _traced_method(cls.__name__, method))
+    return cls
+
+
+def _traced_method(namespace: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    name = f"{namespace}.{method.__name__}"
+
+    @functools.wraps(method)
+    async def traced_method(*args: Any, **kwargs: Any) -> Any:
+        if current_span.get() is None:
+            return await method(*args, **kwargs)
+        with start_span(name, attributes={"code.namespace": namespace}):
+            return await method(*args, **kwargs)
+
+    return traced_method
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Give every SQL statement executed in a sampled trace a client span."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        parent = current_span.get()
+        span = None
+        if parent is not None:
+            operation = statement.lstrip().split(None, 1)[0].upper()
+            span = Span(
+                operation,
+                parent.trace_id,
+                parent.span_id,
+                SpanKind.CLIENT,
+                {
+                    "db.system": "postgresql",
+                    "db.operation.name": operation,
+                    "db.query.text": statement[:MAX_STATEMENT_LENGTH],
+                },
+            )
+        conn.info.setdefault("query_spans", []).append(span)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info["query_spans"].pop()
+        if span is not None:
+            span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def fail_query(context):
+        if context.connection is None:
+            return
+        spans = context.connection.info.get("query_spans")
+        if spans:
+            span = spans.pop()
+            if span is not None:
+                span.record_exception(context.original_exception)
+                span.end()
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """Read the trace id, parent span id and sampled flag of a W3C traceparent.
+
+    Args:
+        value (str | None): The traceparent header, if any.
+
+    Returns:
+        tuple[str, str, bool] | None: The trace context, or None if the header is
+            missing or malformed.
+    """
+    match = TRACEPARENT.match(value.strip().lower()) if value else None
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == INVALID_TRACE_ID or span_id == INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+def sampled(trace_id: str, rate: float) -> bool:
+    """Decide from the trace id alone, so every service keeps the same traces."""
+    return int(trace_id[16:], 16) < rate * 2**64
+
+
+class TracingMiddleware:
+    """Open a server span for each sampled request.
+
+    A valid incoming traceparent makes the request part of the caller's trace
+    and its sampled flag decides whether spans are recorded. Other requests
+    start a new trace, recorded for a share of TRACING_SAMPLE_RATE of them.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not span_exporter.enabled:
+            await self.app(scope, receive, send)
+            return
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        if parent is not None:
+            trace_id, parent_span_id, is_sampled = parent
+        else:
+            trace_id, parent_span_id = os.urandom(16).hex(), None
+            is_sampled = sampled(trace_id, settings.TRACING_SAMPLE_RATE)
+        if not is_sampled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        span = Span(
+            method,
+            trace_id,
+            parent_span_id,
+            SpanKind.SERVER,
+            {"http.request.method": method, "url.path": scope["path"]},
+        )
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                span.attributes["http.response.status_code"] = status
+                if status >= 500:
+                    span.error = f"HTTP {status}"
+            await send(message)
+
+        reset_token = current_span.set(span)
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            current_span.reset(reset_token)
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{method} {route.path}"
+                span.attributes["http.route"] = route.path
+            span.end()
@@ -0,0 +1,50 @@
+"""Add tasks search vector
+
+Revision ID: 3f8d2a6c4b19
+Revises: 7a1c3e5b9f42
+Create Date: 2026-10-18 18:11:37.520946
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8d2a6c4b19"
+down_revision: Union[str, Sequence[str], None] = "7a1c3e5b9f42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "tasks",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A')"
+                " || setweight(to_tsvector('english'::regconfig, "
+                "coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_tasks_search_vector",
+        "tasks",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_search_vector", table_name="tasks", postgresql_using="gin")
+    op.drop_column("tasks", "search_vector")
@@ -0,0 +1,32 @@
+"""Add tasks keyset pagination index
+
+Revision ID: 4b7e2c91d0a3
+Revises: 16c9e31a5699
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e2c91d0a3"
+down_revision: Union[str, Sequence[str], None] = "16c9e31a5699"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_tasks_user_id_created_at_id",
+        "tasks",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_user_id_created_at_id", table_name="tasks")
@@ -0,0 +1,66 @@
+"""Add writing transaction ids to tasks and tombstones
+
+Revision ID: 5e9b2d7f3a16
+Revises: a4c8e1f3b7d2
+Create Date: 2026-10-18 23:02:41.507219
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e9b2d7f3a16"
+down_revision: Union[str, Sequence[str], None] = "a4c8e1f3b7d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows get the id of this migration's transaction
+    for table in ["tasks", "task_tombstones"]:
+        op.add_column(
+            table,
+            sa.Column(
+                "xact_id",
+                sa.BigInteger(),
+                server_default=sa.text("pg_current_xact_id()::text::bigint"),
+                nullable=False,
+            ),
+        )
+    op.drop_index("ix_tasks_user_id_revision", table_name="tasks")
+    op.drop_index("ix_task_tombstones_user_id_revision", table_name="task_tombstones")
+    op.create_index(
+        "ix_tasks_user_id_xact_id_revision",
+        "tasks",
+        ["user_id", "xact_id", "revision"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_task_tombstones_user_id_xact_id_revision",
+        "task_tombstones",
+        ["user_id", "xact_id", "revision"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_task_tombstones_user_id_xact_id_revision", table_name="task_tombstones"
+    )
+    op.drop_index("ix_tasks_user_id_xact_id_revision", table_name="tasks")
+    op.create_index(
+        "ix_task_tombstones_user_id_revision",
+        "task_tombstones",
+        ["user_id", "revision"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_tasks_user_id_revision", "tasks", ["user_id", "revision"], unique=False
+    )
+    op.drop_column("task_tombstones", "xact_id")
+    op.drop_column("tasks", "xact_id")
@@ -0,0 +1,59 @@
+"""Add task change notifications
+
+Revision ID: 7a1c3e5b9f42
+Revises: e2b94d7c1f08
+Create Date: 2026-10-18 17:02:13.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a1c3e5b9f42"
+down_revision: Union[str, Sequence[str], None] = "e2b94d7c1f08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_task_change() RETURNS trigger AS $$
+        DECLARE
+            changed RECORD;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+            PERFORM pg_notify(
+                'task_events',
+                json_build_object(
+                    'user_id', changed.user_id,
+                    'id', changed.id,
+                    'op', lower(TG_OP),
+                    'revision', changed.revision
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tasks_notify_change
+        AFTER INSERT OR UPDATE OR DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION notify_task_change()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS tasks_notify_change ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS notify_task_change()")
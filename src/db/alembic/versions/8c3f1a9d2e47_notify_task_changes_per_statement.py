@@ -0,0 +1,116 @@
+"""Notify task changes once per statement and user
+
+Revision ID: 8c3f1a9d2e47
+Revises: 5e9b2d7f3a16
+Create Date: 2026-10-19 00:41:27.906113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c3f1a9d2e47"
+down_revision: Union[str, Sequence[str], None] = "5e9b2d7f3a16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS tasks_notify_change ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS notify_task_change()")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_task_changes() RETURNS trigger AS $$
+        DECLARE
+            changed RECORD;
+        BEGIN
+            -- Each operation only has one of the transition tables
+            FOR changed IN EXECUTE
+                'SELECT user_id, count(*) AS count, '
+                'json_agg(json_build_array(id, revision) ORDER BY revision) AS tasks '
+                'FROM '
+                || CASE WHEN TG_OP = 'DELETE' THEN 'old_rows' ELSE 'new_rows' END
+                || ' GROUP BY user_id'
+            LOOP
+                PERFORM pg_notify(
+                    'task_events',
+                    json_build_object(
+                        'user_id', changed.user_id,
+                        'op',
+                        CASE WHEN TG_OP = 'INSERT' THEN 'create' ELSE lower(TG_OP) END,
+                        'tasks', CASE WHEN changed.count <= 100 THEN changed.tasks END
+                    )::text
+                );
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tasks_notify_inserts AFTER INSERT ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_task_changes()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tasks_notify_updates AFTER UPDATE ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_task_changes()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tasks_notify_deletes AFTER DELETE ON tasks
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_task_changes()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for trigger in [
+        "tasks_notify_deletes",
+        "tasks_notify_updates",
+        "tasks_notify_inserts",
+    ]:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS notify_task_changes()")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_task_change() RETURNS trigger AS $$
+        DECLARE
+            changed RECORD;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+            PERFORM pg_notify(
+                'task_events',
+                json_build_object(
+                    'user_id', changed.user_id,
+                    'id', changed.id,
+                    'op', lower(TG_OP),
+                    'revision', changed.revision
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tasks_notify_change
+        AFTER INSERT OR UPDATE OR DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION notify_task_change()
+        """
+    )
@@ -0,0 +1,64 @@
+"""Add unique index on tasks user and title
+
+Revision ID: 9d3f6a1e8c27
+Revises: 4b7e2c91d0a3
+Create Date: 2026-10-18 11:02:17.504911
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9d3f6a1e8c27"
+down_revision: Union[str, Sequence[str], None] = "4b7e2c91d0a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent requests may already have stored duplicate titles for a user. Keep
+    # the oldest task of each title and suffix the others with their id, which
+    # keeps the new titles unique and within the column length.
+    op.execute(
+        """
+        UPDATE tasks
+        SET title = left(tasks.title, 216) || ' (' || tasks.id::text || ')'
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, title ORDER BY created_at, id
+            ) AS position
+            FROM tasks
+        ) AS duplicates
+        WHERE tasks.id = duplicates.id AND duplicates.position > 1
+        """
+    )
+    # Build the index without blocking writes. A build that failed (for instance on
+    # a duplicate written since the rename) leaves an invalid index behind, so it is
+    # dropped first to let the upgrade be retried.
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_user_id_title",
+            table_name="tasks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "ix_tasks_user_id_title",
+            "tasks",
+            ["user_id", "title"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_user_id_title",
+            table_name="tasks",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,42 @@
+"""Add pending tasks indexes
+
+Revision ID: b6e0d4f2a873
+Revises: 3f8d2a6c4b19
+Create Date: 2026-10-18 19:04:52.117630
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e0d4f2a873"
+down_revision: Union[str, Sequence[str], None] = "3f8d2a6c4b19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_tasks_user_id_created_at_id_pending",
+        "tasks",
+        ["user_id", "created_at", "id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+    op.create_index(
+        "ix_tasks_user_id_title_pending",
+        "tasks",
+        ["user_id", "title"],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_user_id_title_pending", table_name="tasks")
+    op.drop_index("ix_tasks_user_id_created_at_id_pending", table_name="tasks")
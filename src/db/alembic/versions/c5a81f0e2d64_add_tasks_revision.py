@@ -0,0 +1,39 @@
+"""Add tasks revision
+
+Revision ID: c5a81f0e2d64
+Revises: 9d3f6a1e8c27
+Create Date: 2026-10-18 13:41:05.271530
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5a81f0e2d64"
+down_revision: Union[str, Sequence[str], None] = "9d3f6a1e8c27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence("task_revision_seq")))
+    # nextval() is volatile, so existing rows each get their own revision
+    op.add_column(
+        "tasks",
+        sa.Column(
+            "revision",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('task_revision_seq')"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tasks", "revision")
+    op.execute(sa.schema.DropSequence(sa.Sequence("task_revision_seq")))
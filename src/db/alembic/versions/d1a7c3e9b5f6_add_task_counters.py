@@ -0,0 +1,120 @@
+"""Add task counters
+
+Revision ID: d1a7c3e9b5f6
+Revises: b6e0d4f2a873
+Create Date: 2026-10-18 19:47:20.645118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "d1a7c3e9b5f6"
+down_revision: Union[str, Sequence[str], None] = "b6e0d4f2a873"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_counters",
+        sa.Column("user_id", sa.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "PENDING", "COMPLETED", name="taskstatus", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "status"),
+    )
+    # Keep tasks unchanged between the backfill and the triggers taking over
+    op.execute("LOCK TABLE tasks IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(
+        "INSERT INTO task_counters (user_id, status, count) "
+        "SELECT user_id, status, count(*) FROM tasks GROUP BY user_id, status"
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION count_task_changes() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE task_counters
+                SET count = task_counters.count - deleted.count
+                FROM (
+                    SELECT user_id, status, count(*) AS count
+                    FROM old_rows
+                    GROUP BY user_id, status
+                    ORDER BY user_id, status
+                ) AS deleted
+                WHERE task_counters.user_id = deleted.user_id
+                    AND task_counters.status = deleted.status;
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters (user_id, status, count)
+                SELECT user_id, status, count(*)
+                FROM new_rows
+                GROUP BY user_id, status
+                ORDER BY user_id, status
+                ON CONFLICT (user_id, status)
+                DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+                RETURN NULL;
+            END IF;
+            INSERT INTO task_counters (user_id, status, count)
+            SELECT user_id, status, sum(delta)
+            FROM (
+                SELECT user_id, status, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT user_id, status, -1 AS delta FROM old_rows
+            ) AS changes
+            GROUP BY user_id, status
+            HAVING sum(delta) <> 0
+            ORDER BY user_id, status
+            ON CONFLICT (user_id, status)
+            DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tasks_count_inserts AFTER INSERT ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_task_changes()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tasks_count_updates AFTER UPDATE ON tasks
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_task_changes()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tasks_count_deletes AFTER DELETE ON tasks
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_task_changes()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for trigger in [
+        "tasks_count_inserts",
+        "tasks_count_updates",
+        "tasks_count_deletes",
+    ]:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS count_task_changes()")
+    op.drop_table("task_counters")
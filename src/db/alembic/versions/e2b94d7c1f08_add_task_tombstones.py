@@ -0,0 +1,57 @@
+"""Add task tombstones and revision indexes
+
+Revision ID: e2b94d7c1f08
+Revises: c5a81f0e2d64
+Create Date: 2026-10-18 15:26:49.830114
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2b94d7c1f08"
+down_revision: Union[str, Sequence[str], None] = "c5a81f0e2d64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_tombstones",
+        sa.Column("id", sa.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", sa.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "revision",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('task_revision_seq')"),
+            nullable=False,
+        ),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_task_tombstones_user_id_revision",
+        "task_tombstones",
+        ["user_id", "revision"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_tasks_user_id_revision", "tasks", ["user_id", "revision"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_user_id_revision", table_name="tasks")
+    op.drop_index("ix_task_tombstones_user_id_revision", table_name="task_tombstones")
+    op.drop_table("task_tombstones")
@@ -0,0 +1,137 @@
+"""Add task list versions
+
+Revision ID: f4b2c8d61a95
+Revises: 8c3f1a9d2e47
+Create Date: 2026-10-19 02:13:48.517392
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f4b2c8d61a95"
+down_revision: Union[str, Sequence[str], None] = "8c3f1a9d2e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_list_versions",
+        sa.Column("user_id", sa.UUID(as_uuid=True), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    # Keep tasks unchanged between the backfill and the new trigger body
+    op.execute("LOCK TABLE tasks IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(
+        "INSERT INTO task_list_versions (user_id, version) "
+        "SELECT user_id, nextval('task_revision_seq') "
+        "FROM (SELECT DISTINCT user_id FROM tasks) AS users"
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION count_task_changes() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE task_list_versions
+                SET version = nextval('task_revision_seq')
+                FROM (SELECT DISTINCT user_id FROM old_rows ORDER BY user_id) AS deleted
+                WHERE task_list_versions.user_id = deleted.user_id;
+                UPDATE task_counters
+                SET count = task_counters.count - deleted.count
+                FROM (
+                    SELECT user_id, status, count(*) AS count
+                    FROM old_rows
+                    GROUP BY user_id, status
+                    ORDER BY user_id, status
+                ) AS deleted
+                WHERE task_counters.user_id = deleted.user_id
+                    AND task_counters.status = deleted.status;
+                RETURN NULL;
+            END IF;
+            INSERT INTO task_list_versions (user_id, version)
+            SELECT user_id, nextval('task_revision_seq')
+            FROM (SELECT DISTINCT user_id FROM new_rows ORDER BY user_id) AS written
+            ON CONFLICT (user_id) DO UPDATE SET version = EXCLUDED.version;
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters (user_id, status, count)
+                SELECT user_id, status, count(*)
+                FROM new_rows
+                GROUP BY user_id, status
+                ORDER BY user_id, status
+                ON CONFLICT (user_id, status)
+                DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+                RETURN NULL;
+            END IF;
+            INSERT INTO task_counters (user_id, status, count)
+            SELECT user_id, status, sum(delta)
+            FROM (
+                SELECT user_id, status, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT user_id, status, -1 AS delta FROM old_rows
+            ) AS changes
+            GROUP BY user_id, status
+            HAVING sum(delta) <> 0
+            ORDER BY user_id, status
+            ON CONFLICT (user_id, status)
+            DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION count_task_changes() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE task_counters
+                SET count = task_counters.count - deleted.count
+                FROM (
+                    SELECT user_id, status, count(*) AS count
+                    FROM old_rows
+                    GROUP BY user_id, status
+                    ORDER BY user_id, status
+                ) AS deleted
+                WHERE task_counters.user_id = deleted.user_id
+                    AND task_counters.status = deleted.status;
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_counters (user_id, status, count)
+                SELECT user_id, status, count(*)
+                FROM new_rows
+                GROUP BY user_id, status
+                ORDER BY user_id, status
+                ON CONFLICT (user_id, status)
+                DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+                RETURN NULL;
+            END IF;
+            INSERT INTO task_counters (user_id, status, count)
+            SELECT user_id, status, sum(delta)
+            FROM (
+                SELECT user_id, status, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT user_id, status, -1 AS delta FROM old_rows
+            ) AS changes
+            GROUP BY user_id, status
+            HAVING sum(delta) <> 0
+            ORDER BY user_id, status
+            ON CONFLICT (user_id, status)
+            DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.drop_table("task_list_versions")
@@ -1,5 +1,14 @@
 from src.db.base import Base
-from src.modules.tasks.model import Task
+from src.modules.auth.model import RevokedToken
+from src.modules.tasks.model import Task, TaskCounter, TaskListVersion, TaskTombstone
 from src.modules.users.model import User
 
-__all__ = ["Base", "Task", "User"]
+__all__ = [
+    "Base",
+    "RevokedToken",
+    "Task",
+    "TaskCounter",
+    "TaskListVersion",
+    "TaskTombstone",
+    "User",
+]
@@ -1,6 +1,25 @@
+import time
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from src.core import profiling, tracing
 from src.core.config import settings
+from src.core.metrics import DB_POOL_CHECKOUT_DURATION, instrument_engine
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            DB_POOL_CHECKOUT_DURATION.observe(elapsed)
+            profiling.record("db-checkout", elapsed)
+
 
 # Convert PostgreSQL URL to async format
 async_database_url = settings.DATABASE_URL.replace(
@@ -9,6 +28,7 @@ async_database_url = settings.DATABASE_URL.replace(
 
 async_engine = create_async_engine(
     async_database_url,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,
     # Connection pool configuration for high concurrency
     pool_size=settings.DB_POOL_SIZE,
@@ -17,6 +37,8 @@ async_engine = create_async_engine(
     pool_recycle=settings.DB_POOL_RECYCLE,
     echo=False,
 )
+instrument_engine(async_engine)
+tracing.instrument_engine(async_engine)
 
 AsyncSessionLocal = async_sessionmaker(
     async_engine,
@@ -26,9 +48,17 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Factory for sessions that must outlive the request, such as streamed bodies."""
+    return AsyncSessionLocal
+
+
 async def get_db():
-    db = AsyncSessionLocal()
+    with profiling.timed("get_db"):
+        db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        await db.close()
+        # Closing returns the connection to the pool, which rolls it back
+        with profiling.timed("get_db"):
+            await db.close()
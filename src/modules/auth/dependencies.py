@@ -2,8 +2,9 @@ from fastapi import Depends, Security
 from fastapi.security import HTTPAuthorizationCredentials
 
 from src.common.dependencies import get_auth_repository, get_user_repository
+from src.core.profiling import timed
 from src.modules.auth.repository import AuthRepository
-from src.modules.auth.service import AuthService, token_auth_scheme
+from src.modules.auth.service import AuthService, Principal, token_auth_scheme
 from src.modules.users.model import User
 from src.modules.users.repository import UserRepository
 
@@ -19,4 +20,13 @@ async def get_current_user(
     auth_service: AuthService = Depends(get_auth_service),
     token: HTTPAuthorizationCredentials = Security(token_auth_scheme),
 ) -> User:
-    return await auth_service.authenticate_user(token.credentials)
+    with timed("get_current_user"):
+        return await auth_service.authenticate_user(token.credentials)
+
+
+async def get_current_principal(
+    auth_service: AuthService = Depends(get_auth_service),
+    token: HTTPAuthorizationCredentials = Security(token_auth_scheme),
+) -> Principal:
+    with timed("get_current_principal"):
+        return await auth_service.authenticate_principal(token.credentials)
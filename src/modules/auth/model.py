@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db.base import Base
+
+
+class RevokedToken(Base):
+    """Access token revoked by a logout, kept until it would have expired anyway."""
+
+    __tablename__ = "revoked_tokens"
+    # SHA-256 of the encoded token, so the table never holds usable credentials
+    token_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
@@ -1,11 +1,33 @@
+from datetime import datetime
+
 from passlib.context import CryptContext
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.common.executor import BoundedExecutor
+from src.core.config import settings
+from src.core.tracing import traced
+from src.modules.auth.model import RevokedToken
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=10)
 
+# bcrypt releases the GIL, so a thread pool is enough to keep it off the event loop
+password_hash_executor = BoundedExecutor(
+    name="password-hash",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
 
+
+@traced
 class AuthRepository:
-    def __init__(self) -> None:
-        self.pwd_context = CryptContext(
-            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=10
-        )
+    def __init__(
+        self, db: AsyncSession, executor: BoundedExecutor = password_hash_executor
+    ) -> None:
+        self.db = db
+        self.pwd_context = pwd_context
+        self.executor = executor
 
     async def get_password_hash(self, password: str) -> str:
         """
@@ -16,8 +38,11 @@ class AuthRepository:
 
         Returns:
             str: The hashed password string.
+
+        Raises:
+            HTTPException: If the hashing pool is saturated.
         """
-        return self.pwd_context.hash(password)
+        return await self.executor.run(self.pwd_context.hash, password)
 
     async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
@@ -29,5 +54,43 @@ class AuthRepository:
 
         Returns:
             bool: True if the passwords match, False otherwise.
+
+        Raises:
+            HTTPException: If the hashing pool is saturated.
+        """
+        return await self.executor.run(
+            self.pwd_context.verify, plain_password, hashed_password
+        )
+
+    async def revoke_token(self, token_hash: str, expires_at: datetime) -> None:
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        Record a revoked access token and forget revoked tokens that have expired.
+
+        Args:
+            token_hash (str): SHA-256 hex digest of the encoded token.
+            expires_at (datetime): When the token expires on its own.
+        """
+        await self.db.execute(
+            pg_insert(RevokedToken)
+            .values(token_hash=token_hash, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.token_hash])
+        )
+        await self.db.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= func.now())
+        )
+        await self.db.commit()
+
+    async def is_token_revoked(self, token_hash: str) -> bool:
+        """
+        Check whether an access token has been revoked.
+
+        Args:
+            token_hash (str): SHA-256 hex digest of the encoded token.
+
+        Returns:
+            bool: True if the token was revoked, False otherwise.
+        """
+        revoked = await self.db.scalar(
+            select(exists().where(RevokedToken.token_hash == token_hash))
+        )
+        return bool(revoked)
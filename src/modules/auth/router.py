@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Security
+from fastapi.security import HTTPAuthorizationCredentials
 
+from src.core.profiling import ProfiledRoute
 from src.modules.auth.dependencies import get_auth_service
-from src.modules.auth.service import AuthService
+from src.modules.auth.service import AuthService, token_auth_scheme
 from src.modules.users.dto import CreateUser as LoginUser
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("/login")
@@ -12,3 +14,11 @@ async def login(
     user_data: LoginUser, auth_service: AuthService = Depends(get_auth_service)
 ):
     return await auth_service.login_user(user_data=user_data)
+
+
+@router.post("/logout")
+async def logout(
+    auth_service: AuthService = Depends(get_auth_service),
+    token: HTTPAuthorizationCredentials = Security(token_auth_scheme),
+):
+    await auth_service.logout_user(token.credentials)
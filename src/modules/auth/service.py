@@ -1,3 +1,5 @@
+import hashlib
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from uuid import UUID
@@ -7,8 +9,11 @@ from jose import jwt
 from pydantic.main import BaseModel
 from starlette.exceptions import HTTPException
 
+from src.common.cache import LRUCache
+from src.core.audit import audit
 from src.core.config import settings
-from src.core.logging import audit, logger
+from src.core.logging import logger
+from src.core.tracing import traced
 from src.modules.auth.repository import AuthRepository
 from src.modules.users.dto import CreateUser
 from src.modules.users.model import User
@@ -23,12 +28,42 @@ class TokenPayload(BaseModel):
     exp: Optional[datetime] = None
 
 
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Authenticated identity taken from a verified access token."""
+
+    id: UUID
+    email: str
+
+
+@dataclass(frozen=True, slots=True)
+class VerifiedToken:
+    payload: TokenPayload
+    user: User | None = None
+
+
+def token_hash(credentials: str) -> str:
+    return hashlib.sha256(credentials.encode()).hexdigest()
+
+
+# Keyed by the whole encoded token, so a cache hit implies an identical signature
+token_cache: LRUCache[str, VerifiedToken] = LRUCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+
+@traced
 class AuthService:
     def __init__(
-        self, user_repository: UserRepository, auth_repository: AuthRepository
+        self,
+        user_repository: UserRepository,
+        auth_repository: AuthRepository,
+        token_cache: LRUCache[str, VerifiedToken] = token_cache,
     ):
         self.user_repository = user_repository
         self.auth_repository = auth_repository
+        self.token_cache = token_cache
 
     def _create_access_token(
         self, data: TokenPayload, expires_delta: Optional[timedelta] = None
@@ -79,14 +114,54 @@ class AuthService:
                 id=payload["id"], email=payload["email"], exp=payload["exp"]
             )
         except Exception as error:
-            logger.error(f"Error decoding token: {error}")
+            logger.warning(f"Error decoding token: {error}")
             raise HTTPException(403, "Invalid token")
         return token_payload
 
+    def _cache_token(self, credentials: str, verified: VerifiedToken) -> None:
+        ttl: float = settings.AUTH_CACHE_TTL_SECONDS
+        if verified.payload.exp is not None:
+            remaining = verified.payload.exp - datetime.now(timezone.utc)
+            ttl = min(ttl, remaining.total_seconds())
+        self.token_cache.set(credentials, verified, ttl=ttl)
+
+    async def _verify_token(self, credentials: str) -> VerifiedToken:
+        """
+        Verify a token, using the token cache when possible.
+
+        Revocations are stored in the database and checked on cache misses, so a
+        token cached by a worker before it was revoked elsewhere stays usable on
+        that worker for at most AUTH_CACHE_TTL_SECONDS.
+
+        Args:
+            credentials (str): Expected encoded data string
+
+        Returns:
+            VerifiedToken: Token data, plus the resolved user if it was cached
+
+        Raises:
+            HTTPException: in case the token is invalid or has been revoked
+        """
+        cached = self.token_cache.get(credentials)
+        if cached is not None:
+            return cached
+        verified = VerifiedToken(payload=self._decode_access_token(credentials))
+        if settings.AUTH_CHECK_REVOKED_TOKENS and (
+            await self.auth_repository.is_token_revoked(token_hash(credentials))
+        ):
+            logger.warning(f"Revoked token used for user {verified.payload.email}")
+            raise HTTPException(403, "Invalid token")
+        self._cache_token(credentials, verified)
+        return verified
+
     async def authenticate_user(self, credentials: str) -> User:
         """
         Authenticates a user based on credentials validation
 
+        Verified tokens are cached until they expire (or AUTH_CACHE_TTL_SECONDS
+        elapses), so repeated requests with the same token skip both the JWT
+        decoding and the user lookup.
+
         Args:
             credentials (str): Expected encoded data string
 
@@ -97,10 +172,57 @@ class AuthService:
             HTTPException: in case the credentials can not be validated or the user id
             is not found
         """
-        data = self._decode_access_token(credentials)
-        user = await self.user_repository.get_by_id(id=data.id)
+        verified = await self._verify_token(credentials)
+        if verified.user is not None:
+            return verified.user
+        user = await self.user_repository.get_by_id(id=verified.payload.id)
+        # Cache a detached copy so the entry never holds on to a request's session
+        identity = User(id=user.id, email=user.email, created_at=user.created_at)
+        self._cache_token(credentials, VerifiedToken(verified.payload, identity))
         return user
 
+    async def authenticate_principal(self, credentials: str) -> Principal:
+        """
+        Authenticates the caller and returns a lightweight principal
+
+        With AUTH_STATELESS_PRINCIPAL enabled the principal is built from the
+        verified token alone, without confirming the user still exists.
+
+        Args:
+            credentials (str): Expected encoded data string
+
+        Returns:
+            Principal: id and email of the authenticated user
+
+        Raises:
+            HTTPException: in case the credentials can not be validated or the user id
+            is not found
+        """
+        if settings.AUTH_STATELESS_PRINCIPAL:
+            payload = (await self._verify_token(credentials)).payload
+            return Principal(id=payload.id, email=payload.email)
+        user = await self.authenticate_user(credentials)
+        # users.id is mapped with as_uuid=False, so normalize it for callers
+        return Principal(id=UUID(str(user.id)), email=user.email)
+
+    async def logout_user(self, credentials: str) -> None:
+        """
+        Revokes an access token so it can no longer be used
+
+        Args:
+            credentials (str): Expected encoded data string
+
+        Raises:
+            HTTPException: in case the token is invalid or already revoked
+        """
+        payload = (await self._verify_token(credentials)).payload
+        expires_at = payload.exp or datetime.now(timezone.utc) + timedelta(
+            minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+        )
+        await self.auth_repository.revoke_token(token_hash(credentials), expires_at)
+        self.token_cache.delete(credentials)
+        audit("auth.logout", payload.email)
+
     async def login_user(self, user_data: CreateUser) -> str:
         """
         Logs in a user
@@ -120,16 +242,16 @@ class AuthService:
         try:
             user_found = await self.user_repository.get_by_email(email=user_data.email)
         except HTTPException:
-            logger.error(f"Login failed: user {user_data.email} not found")
+            logger.warning(f"Login failed: user {user_data.email} not found")
             raise HTTPException(status_code=403, detail="Incorrect email or password")
         valid_password = await self.auth_repository.verify_password(
             plain_password=user_data.password,
             hashed_password=user_found.hashed_password,
         )
         if not valid_password:
-            logger.error(f"Login failed: invalid password for user {user_data.email}")
+            logger.warning(f"Login failed: invalid password for user {user_data.email}")
             raise HTTPException(status_code=403, detail="Incorrect email or password")
         data = TokenPayload(id=user_found.id, email=user_found.email)
         token = self._create_access_token(data=data)
-        audit(f"Login successful for {user_data.email}")
+        audit("auth.login", user_data.email)
         return token
@@ -0,0 +1,111 @@
+import itertools
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from src.common.cache import CacheBackend, InMemoryCacheBackend, LRUCache
+from src.core.config import settings
+from src.modules.tasks.schema import ReadTask
+
+
+class CachedTask(BaseModel):
+    revision: int
+    task: ReadTask
+
+
+class TaskCache:
+    """Read-through cache of serialized tasks keyed by owner and task id.
+
+    Callers take the generation of a task before loading it and store it under
+    that generation. Invalidating a task drops its generation, so a load that raced
+    with a write is not stored back after the write invalidated the entry.
+    """
+
+    _counter = itertools.count(1)
+
+    def __init__(self, backend: CacheBackend, generations: LRUCache[str, int]):
+        self.backend = backend
+        self.generations = generations
+
+    @staticmethod
+    def _key(user_id: UUID, task_id: UUID) -> str:
+        return f"task:{user_id}:{task_id}"
+
+    def generation(self, user_id: UUID, task_id: UUID) -> int:
+        key = self._key(user_id, task_id)
+        generation = self.generations.get(key)
+        if generation is None:
+            generation = next(self._counter)
+            self.generations.set(key, generation)
+        return generation
+
+    async def get(self, user_id: UUID, task_id: UUID) -> CachedTask | None:
+        raw = await self.backend.get(self._key(user_id, task_id))
+        return CachedTask.model_validate_json(raw) if raw is not None else None
+
+    async def set(
+        self, user_id: UUID, task: ReadTask, revision: int, generation: int
+    ) -> None:
+        key = self._key(user_id, task.id)
+        if self.generations.get(key) != generation:
+            return
+        cached = CachedTask(revision=revision, task=task)
+        await self.backend.set(key, cached.model_dump_json().encode())
+
+    async def invalidate(self, user_id: UUID, *task_ids: UUID) -> None:
+        keys = [self._key(user_id, id) for id in task_ids]
+        for key in keys:
+            self.generations.delete(key)
+        await self.backend.delete(*keys)
+
+
+# Entries can only be invalidated by writes served by the same worker, so the time
+# to live bounds staleness across workers.
+task_cache = TaskCache(
+    InMemoryCacheBackend(
+        max_entries=settings.TASK_CACHE_MAX_ENTRIES,
+        ttl=settings.TASK_CACHE_TTL_SECONDS,
+    ),
+    generations=LRUCache(
+        max_entries=settings.TASK_CACHE_MAX_ENTRIES,
+        ttl=settings.TASK_CACHE_TTL_SECONDS,
+    ),
+)
+
+
+class TaskListCache:
+    """Encoded task listings, keyed by the listing version of their user.
+
+    The version is kept in the database and moved by the tasks table triggers on
+    every write, so a write served by any worker retires the listings of all of
+    them. Callers read the version before building a listing and store it under
+    that version, so a listing that raced with a write is filed under the version
+    the write replaced.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(user_id: UUID, version: int, params: dict[str, Any]) -> str:
+        query = "&".join(f"{name}={value}" for name, value in sorted(params.items()))
+        return f"tasks:{user_id}:{version}:{query}"
+
+    async def get(
+        self, user_id: UUID, version: int, params: dict[str, Any]
+    ) -> bytes | None:
+        return await self.backend.get(self._key(user_id, version, params))
+
+    async def set(
+        self, user_id: UUID, version: int, params: dict[str, Any], body: bytes
+    ) -> None:
+        await self.backend.set(self._key(user_id, version, params), body)
+
+
+task_list_cache = TaskListCache(
+    InMemoryCacheBackend(
+        max_entries=settings.TASK_LIST_CACHE_MAX_ENTRIES,
+        ttl=settings.TASK_LIST_CACHE_TTL_SECONDS,
+    )
+)
@@ -1,16 +1,21 @@
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from src.db.session import get_db
+from src.core.profiling import timed
+from src.db.session import get_db, get_sessionmaker
 from src.modules.tasks.repository import TaskRepository
 from src.modules.tasks.service import TaskService
 
 
-async def get_task_repository(db: AsyncSession = Depends(get_db)) -> TaskRepository:
-    return TaskRepository(db=db)
+async def get_task_repository(
+    db: AsyncSession = Depends(get_db),
+    sessions: async_sessionmaker[AsyncSession] = Depends(get_sessionmaker),
+) -> TaskRepository:
+    return TaskRepository(db=db, sessions=sessions)
 
 
 async def get_task_service(
     repository: TaskRepository = Depends(get_task_repository),
 ) -> TaskService:
-    return TaskService(repository=repository)
+    with timed("get_task_service"):
+        return TaskService(repository=repository)
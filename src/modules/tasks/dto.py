@@ -1,5 +1,11 @@
-from pydantic import BaseModel, field_validator
+import enum
+from datetime import datetime
+from uuid import UUID
 
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from src.common.pagination import SortDirection
+from src.core.config import settings
 from src.core.logging import logger
 from src.modules.tasks.model import TaskStatus
 
@@ -11,7 +17,7 @@ class TaskBase(BaseModel):
     @field_validator("title")
     def title_must_not_be_empty(cls, v):
         if v is not None and not v.strip():
-            logger.error("Title must not be empty")
+            logger.info("Title must not be empty")
             raise ValueError("Title must not be empty")
         return v
 
@@ -24,3 +30,33 @@ class CreateTask(TaskBase):
 class UpdateTask(TaskBase):
     description: str | None = None
     status: TaskStatus | None = None
+
+
+class BulkUpdateTasks(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=settings.TASKS_BULK_MAX_ITEMS)
+    description: str | None = None
+    status: TaskStatus | None = None
+
+    @model_validator(mode="after")
+    def changes_must_not_be_empty(self):
+        if self.description is None and self.status is None:
+            logger.info("Bulk update without changes")
+            raise ValueError("At least one of description or status is required")
+        return self
+
+
+class BulkDeleteTasks(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=settings.TASKS_BULK_MAX_ITEMS)
+
+
+class TaskSortField(str, enum.Enum):
+    CREATED_AT = "created_at"
+    TITLE = "title"
+
+
+class TaskFilters(BaseModel):
+    status: TaskStatus | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    sort: TaskSortField = TaskSortField.CREATED_AT
+    direction: SortDirection = SortDirection.ASC
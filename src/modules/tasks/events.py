@@ -0,0 +1,190 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any
+
+import asyncpg  # type: ignore[import-untyped]
+from sqlalchemy.engine import make_url
+
+from src.core.config import settings
+from src.core.logging import logger
+
+# Part of the schema: the trigger function below and the migrations that create it
+# name this channel
+TASK_EVENTS_CHANNEL = "task_events"
+
+# Largest number of changed tasks listed in one notification. Payloads are capped
+# at 8000 bytes and each task takes about 55, so larger batches are announced
+# without their tasks and subscribers resync instead.
+NOTIFY_MAX_TASKS = 100
+
+# Run once per statement on the tasks table, sending one notification per user
+# with the id and revision of each changed task. Notifying per row made bulk
+# writes send one NOTIFY per task, and NOTIFY serializes commits. The
+# notifications are only delivered once the writing transaction commits.
+NOTIFY_TASK_CHANGES_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION notify_task_changes() RETURNS trigger AS $$
+DECLARE
+    changed RECORD;
+BEGIN
+    -- Each operation only has one of the transition tables
+    FOR changed IN EXECUTE
+        'SELECT user_id, count(*) AS count, '
+        'json_agg(json_build_array(id, revision) ORDER BY revision) AS tasks '
+        'FROM ' || CASE WHEN TG_OP = 'DELETE' THEN 'old_rows' ELSE 'new_rows' END
+        || ' GROUP BY user_id'
+    LOOP
+        PERFORM pg_notify(
+            '{TASK_EVENTS_CHANNEL}',
+            json_build_object(
+                'user_id', changed.user_id,
+                'op', CASE WHEN TG_OP = 'INSERT' THEN 'create' ELSE lower(TG_OP) END,
+                'tasks', CASE
+                    WHEN changed.count <= {NOTIFY_MAX_TASKS} THEN changed.tasks
+                END
+            )::text
+        );
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Transition tables require one trigger per operation
+NOTIFY_TASK_CHANGES_TRIGGERS = [
+    """
+    CREATE TRIGGER tasks_notify_inserts AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_task_changes()
+    """,
+    """
+    CREATE TRIGGER tasks_notify_updates AFTER UPDATE ON tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_task_changes()
+    """,
+    """
+    CREATE TRIGGER tasks_notify_deletes AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_task_changes()
+    """,
+]
+
+# Queued in place of the events a subscriber missed, so its client catches up
+# through the changes feed
+RESYNC = {"op": "resync"}
+
+
+class TaskEventBroker:
+    """Fans task change notifications out to the subscribers of this worker.
+
+    A single asyncpg connection per worker LISTENs on the channel, opened when the
+    first subscriber arrives. Each subscriber gets a bounded queue. When events are
+    lost, because a subscriber is not keeping up or the connection dropped, they
+    are counted and the subscriber gets a RESYNC marker instead.
+    """
+
+    def __init__(self, dsn: str, channel: str, queue_size: int):
+        self.dsn = dsn
+        self.channel = channel
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._subscribers: defaultdict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._connection: asyncpg.Connection | None = None
+        self._lock = asyncio.Lock()
+        self._reconnecting: asyncio.Task | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def subscribe(self, user_id: Any) -> asyncio.Queue:
+        """Register a queue receiving the task events of a user."""
+        await self._listen()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[str(user_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: Any, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(str(user_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(user_id)]
+
+    async def stop(self) -> None:
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+        async with self._lock:
+            if self._connection is not None:
+                await self._connection.close()
+                self._connection = None
+
+    async def _listen(self) -> None:
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            self._connection = await asyncpg.connect(self.dsn)
+            self._connection.add_termination_listener(self._on_termination)
+            await self._connection.add_listener(self.channel, self._on_notify)
+            logger.info(f"Listening for task events on channel {self.channel}")
+
+    def _on_termination(self, connection: asyncpg.Connection) -> None:
+        logger.warning("Task events connection lost")
+        if connection is self._connection:
+            self._connection = None
+            if self._subscribers and self._reconnecting is None:
+                self._reconnecting = asyncio.get_running_loop().create_task(
+                    self._reconnect()
+                )
+
+    async def _reconnect(self) -> None:
+        delay = 1.0
+        try:
+            while self._subscribers and self._connection is None:
+                try:
+                    await self._listen()
+                except (OSError, asyncpg.PostgresError) as error:
+                    logger.warning(f"Task events reconnection failed: {error}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+            # Nothing was delivered while the connection was down
+            for queues in self._subscribers.values():
+                for queue in queues:
+                    self._resync(queue)
+        finally:
+            self._reconnecting = None
+
+    def _on_notify(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        notification = json.loads(payload)
+        queues = self._subscribers.get(notification["user_id"], ())
+        if notification["tasks"] is None:
+            # Too many tasks changed at once to list them
+            for queue in queues:
+                self._resync(queue)
+            return
+        for task_id, revision in notification["tasks"]:
+            event = {"id": task_id, "op": notification["op"], "revision": revision}
+            for queue in queues:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+                    self._resync(queue)
+
+    def _resync(self, queue: asyncio.Queue) -> None:
+        # The changes feed covers whatever is still queued as well
+        while not queue.empty():
+            if queue.get_nowait() is not RESYNC:
+                self.dropped += 1
+        queue.put_nowait(RESYNC)
+
+
+task_event_broker = TaskEventBroker(
+    dsn=make_url(settings.DATABASE_URL)
+    .set(drivername="postgresql")
+    .render_as_string(hide_password=False),
+    channel=TASK_EVENTS_CHANNEL,
+    queue_size=settings.TASK_EVENTS_QUEUE_SIZE,
+)
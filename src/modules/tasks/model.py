@@ -3,13 +3,32 @@ from __future__ import annotations
 import enum
 from datetime import datetime
 from typing import TYPE_CHECKING
+from uuid import UUID as TypedUUID
 from uuid import uuid4
 
-from sqlalchemy import DateTime, Enum, ForeignKey, String, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Column,
+    Computed,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Sequence,
+    String,
+    event,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db.base import Base
+from src.modules.tasks.events import (
+    NOTIFY_TASK_CHANGES_FUNCTION,
+    NOTIFY_TASK_CHANGES_TRIGGERS,
+)
 
 if TYPE_CHECKING:
     from src.modules.users.model import User  # noqa: F401
@@ -20,9 +39,52 @@ class TaskStatus(str, enum.Enum):
     COMPLETED = "COMPLETED"
 
 
+# Title matches rank above description matches
+TASK_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')"
+)
+
+# Every insert and update draws a new value, so a revision identifies one exact
+# version of one task
+task_revision_seq = Sequence("task_revision_seq", metadata=Base.metadata)
+
+# Id of the transaction writing a row. Revisions are drawn when a row is written but
+# only become visible when the transaction commits, so they can appear out of order;
+# the changes feed pages by transaction instead and skips rows of transactions that
+# may still be running
+CURRENT_XACT_ID = text("pg_current_xact_id()::text::bigint")
+
+
 class Task(Base):
     __tablename__ = "tasks"
-    id: Mapped[UUID] = mapped_column(
+    __table_args__ = (
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_tasks_user_id_title", "user_id", "title", unique=True),
+        Index("ix_tasks_user_id_xact_id_revision", "user_id", "xact_id", "revision"),
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        # Pending tasks are the common view and a minority of the rows; completed
+        # tasks are read through the full per-user indexes above
+        Index(
+            "ix_tasks_user_id_created_at_id_pending",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+        Index(
+            "ix_tasks_user_id_title_pending",
+            "user_id",
+            "title",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
+    # Fetch server defaults such as created_at with RETURNING on flush
+    __mapper_args__ = {
+        "eager_defaults": True,
+        "exclude_properties": ["search_vector"],
+    }
+    id: Mapped[TypedUUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=lambda: str(uuid4())
     )
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -33,8 +95,160 @@ class Task(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    revision: Mapped[int] = mapped_column(
+        BigInteger, server_default=task_revision_seq.next_value(), nullable=False
+    )
+    xact_id: Mapped[int] = mapped_column(
+        BigInteger, server_default=CURRENT_XACT_ID, nullable=False
+    )
+    # Kept up to date by Postgres and left unmapped, so neither reads nor the
+    # RETURNING of flushes ever load it; query it through Task.__table__.c
+    search_vector = Column(
+        TSVECTOR, Computed(TASK_SEARCH_VECTOR, persisted=True), nullable=True
+    )
 
-    user_id: Mapped[int] = mapped_column(
+    user_id: Mapped[TypedUUID] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     owner: Mapped["User"] = relationship("User", back_populates="tasks")
+
+
+class TaskTombstone(Base):
+    """Marker left behind by a deleted task, so clients syncing changes see it."""
+
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        Index(
+            "ix_task_tombstones_user_id_xact_id_revision",
+            "user_id",
+            "xact_id",
+            "revision",
+        ),
+    )
+    id: Mapped[TypedUUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[TypedUUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    revision: Mapped[int] = mapped_column(
+        BigInteger, server_default=task_revision_seq.next_value(), nullable=False
+    )
+    xact_id: Mapped[int] = mapped_column(
+        BigInteger, server_default=CURRENT_XACT_ID, nullable=False
+    )
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class TaskCounter(Base):
+    """Number of tasks of a user in one status, maintained by database triggers."""
+
+    __tablename__ = "task_counters"
+    user_id: Mapped[TypedUUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class TaskListVersion(Base):
+    """Version of the task listings of a user, bumped by database triggers on
+    every write to the user's tasks."""
+
+    __tablename__ = "task_list_versions"
+    user_id: Mapped[TypedUUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+# Statement-level triggers apply the net change of each write to the counters, so
+# bulk statements update each (user, status) row once, and move the listing version
+# of each user written to a new value of the revision sequence. Rows are visited in
+# key order to keep concurrent writers from deadlocking. Deletions only update
+# existing rows: a cascading user deletion may already have removed them.
+COUNT_TASK_CHANGES_FUNCTION = """
+CREATE OR REPLACE FUNCTION count_task_changes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE task_list_versions
+        SET version = nextval('task_revision_seq')
+        FROM (SELECT DISTINCT user_id FROM old_rows ORDER BY user_id) AS deleted
+        WHERE task_list_versions.user_id = deleted.user_id;
+        UPDATE task_counters
+        SET count = task_counters.count - deleted.count
+        FROM (
+            SELECT user_id, status, count(*) AS count
+            FROM old_rows
+            GROUP BY user_id, status
+            ORDER BY user_id, status
+        ) AS deleted
+        WHERE task_counters.user_id = deleted.user_id
+            AND task_counters.status = deleted.status;
+        RETURN NULL;
+    END IF;
+    INSERT INTO task_list_versions (user_id, version)
+    SELECT user_id, nextval('task_revision_seq')
+    FROM (SELECT DISTINCT user_id FROM new_rows ORDER BY user_id) AS written
+    ON CONFLICT (user_id) DO UPDATE SET version = EXCLUDED.version;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO task_counters (user_id, status, count)
+        SELECT user_id, status, count(*)
+        FROM new_rows
+        GROUP BY user_id, status
+        ORDER BY user_id, status
+        ON CONFLICT (user_id, status)
+        DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+        RETURN NULL;
+    END IF;
+    INSERT INTO task_counters (user_id, status, count)
+    SELECT user_id, status, sum(delta)
+    FROM (
+        SELECT user_id, status, 1 AS delta FROM new_rows
+        UNION ALL
+        SELECT user_id, status, -1 AS delta FROM old_rows
+    ) AS changes
+    GROUP BY user_id, status
+    HAVING sum(delta) <> 0
+    ORDER BY user_id, status
+    ON CONFLICT (user_id, status)
+    DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Transition tables require one trigger per operation
+COUNT_TASK_CHANGES_TRIGGERS = [
+    """
+    CREATE TRIGGER tasks_count_inserts AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_task_changes()
+    """,
+    """
+    CREATE TRIGGER tasks_count_updates AFTER UPDATE ON tasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_task_changes()
+    """,
+    """
+    CREATE TRIGGER tasks_count_deletes AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_task_changes()
+    """,
+]
+
+# Publish task changes with NOTIFY from the database itself, so every write path
+# (including bulk statements) is covered without extra round trips
+for statement in [NOTIFY_TASK_CHANGES_FUNCTION, *NOTIFY_TASK_CHANGES_TRIGGERS]:
+    event.listen(
+        Task.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+
+for statement in [COUNT_TASK_CHANGES_FUNCTION, *COUNT_TASK_CHANGES_TRIGGERS]:
+    event.listen(
+        Task.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
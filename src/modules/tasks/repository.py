@@ -1,17 +1,66 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Any, NoReturn
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
-
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    Delete,
+    Float,
+    Row,
+    Select,
+    Text,
+    and_,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.common.pagination import CountMode, SortDirection
 from src.core.logging import logger
-from src.modules.tasks.dto import CreateTask, UpdateTask
-from src.modules.tasks.model import Task
-
-
+from src.core.tracing import traced
+from src.db.session import AsyncSessionLocal
+from src.modules.tasks.dto import (
+    BulkUpdateTasks,
+    CreateTask,
+    TaskFilters,
+    TaskSortField,
+    UpdateTask,
+)
+from src.modules.tasks.model import (
+    CURRENT_XACT_ID,
+    Task,
+    TaskCounter,
+    TaskListVersion,
+    TaskStatus,
+    TaskTombstone,
+    task_revision_seq,
+)
+
+
+@traced
 class TaskRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        sessions: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    ):
         self.db = db
+        self.sessions = sessions
 
     async def create(self, user_id: UUID, task: CreateTask) -> Task:
         """Create a new task.
@@ -27,47 +76,419 @@ class TaskRepository:
             HTTPException: If the task already exists.
 
         """
-        result = await self.db.execute(
-            select(Task).where(Task.title == task.title, Task.user_id == user_id)
+        result = await self.db.scalars(
+            pg_insert(Task)
+            .values(title=task.title, description=task.description, user_id=user_id)
+            .on_conflict_do_nothing(index_elements=[Task.user_id, Task.title])
+            .returning(Task)
         )
-        db_task = result.scalar_one_or_none()
+        db_task = result.one_or_none()
 
-        if db_task:
-            logger.error(f"There is a task with the same title {task.title}")
+        if not db_task:
+            await self.db.rollback()
+            logger.info(f"There is a task with the same title {task.title}")
             raise HTTPException(status_code=400, detail="Task already exists")
 
-        db_task = Task(title=task.title, description=task.description, user_id=user_id)
-        self.db.add(db_task)
         await self.db.commit()
-        await self.db.refresh(db_task)
         return db_task
 
+    async def create_many(
+        self, user_id: UUID, tasks: list[CreateTask]
+    ) -> list[Task | None]:
+        """Create several tasks with a single multi-row insert.
+
+        Args:
+            user_id (UUID): The user owner ID of the tasks.
+            tasks (list[CreateTask]): The tasks to create.
+
+        Returns:
+            list[Task | None]: The created task for each input position, or None
+            where the title already exists or repeats an earlier one in the batch.
+            Conflicts are resolved by the unique (user_id, title) index.
+
+        """
+        positions: dict[str, int] = {}
+        for index, task in enumerate(tasks):
+            positions.setdefault(task.title, index)
+
+        results = await self.db.scalars(
+            pg_insert(Task)
+            .on_conflict_do_nothing(index_elements=[Task.user_id, Task.title])
+            .returning(Task),
+            [
+                {
+                    "title": tasks[index].title,
+                    "description": tasks[index].description,
+                    "user_id": user_id,
+                }
+                for index in positions.values()
+            ],
+        )
+        created: list[Task | None] = [None] * len(tasks)
+        # Conflicting rows are skipped by RETURNING, so match results by title
+        for db_task in results.all():
+            created[positions[db_task.title]] = db_task
+        await self.db.commit()
+        return created
+
+    async def count(self, user_id: UUID, filters: TaskFilters | None = None) -> int:
+        """Count the tasks of a user.
+
+        Unless the count is narrowed by creation dates, it is read from the
+        counters kept by the tasks table triggers instead of from the tasks.
+
+        Args:
+            user_id (UUID): The user owner ID of the tasks.
+            filters (TaskFilters | None): The filters the tasks must match.
+
+        Returns:
+            int: The total number of tasks.
+
+        """
+        filters = filters or TaskFilters()
+        if self._counted_by_counters(filters):
+            # The sum of a bigint column comes back as a numeric
+            query = self._counters_total(user_id, filters)
+            return int((await self.db.execute(query)).scalar_one())
+        result = await self.db.execute(
+            self._filter(select(func.count()).select_from(Task), user_id, filters)
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    def _counted_by_counters(filters: TaskFilters) -> bool:
+        """Whether the task counters, kept per user and status, give the count."""
+        return filters.created_after is None and filters.created_before is None
+
+    @staticmethod
+    def _counters_total(user_id: UUID, filters: TaskFilters) -> Select:
+        query = select(func.coalesce(func.sum(TaskCounter.count), 0)).where(
+            TaskCounter.user_id == user_id
+        )
+        if filters.status is not None:
+            query = query.where(TaskCounter.status == filters.status)
+        return query
+
+    async def estimate_count(
+        self, user_id: UUID, filters: TaskFilters | None = None
+    ) -> int:
+        """Estimate the tasks of a user from the query planner statistics.
+
+        Args:
+            user_id (UUID): The user owner ID of the tasks.
+            filters (TaskFilters | None): The filters the tasks must match.
+
+        Returns:
+            int: The planner's row estimate, which may be off for small tables.
+
+        """
+        filters = filters or TaskFilters()
+        conditions = ["user_id = :user_id"]
+        if filters.status is not None:
+            conditions.append("status = :status")
+        if filters.created_after is not None:
+            conditions.append("created_at > :created_after")
+        if filters.created_before is not None:
+            conditions.append("created_at < :created_before")
+        result = await self.db.execute(
+            text(
+                "EXPLAIN (FORMAT JSON) SELECT 1 FROM tasks WHERE "
+                + " AND ".join(conditions)
+            ),
+            {
+                "user_id": user_id,
+                "status": filters.status.name if filters.status else None,
+                "created_after": filters.created_after,
+                "created_before": filters.created_before,
+            },
+        )
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def sort_keys(filters: TaskFilters) -> tuple[InstrumentedAttribute, ...]:
+        """The columns a listing is ordered by, which also make up its cursors."""
+        if filters.sort is TaskSortField.TITLE:
+            # Titles are unique per user, so they need no tiebreaker
+            return (Task.title,)
+        return (Task.created_at, Task.id)
+
+    def _filter(self, query: Select, user_id: UUID, filters: TaskFilters) -> Select:
+        query = query.where(Task.user_id == user_id)
+        if filters.status is not None:
+            # Inlined rather than bound, so that generic plans of the prepared
+            # statement can still match the partial indexes on status
+            query = query.where(
+                Task.status
+                == literal(filters.status, Task.status.type, literal_execute=True)
+            )
+        if filters.created_after is not None:
+            query = query.where(Task.created_at > filters.created_after)
+        if filters.created_before is not None:
+            query = query.where(Task.created_at < filters.created_before)
+        return query
+
+    def _order(self, query: Select, filters: TaskFilters) -> Select:
+        keys = self.sort_keys(filters)
+        if filters.direction is SortDirection.DESC:
+            return query.order_by(*(key.desc() for key in keys))
+        return query.order_by(*keys)
+
     async def get_all(
-        self, user_id: UUID, page: int, page_size: int
-    ) -> tuple[list[Task], int]:
+        self,
+        user_id: UUID,
+        page: int,
+        page_size: int,
+        count_mode: CountMode | None = CountMode.EXACT,
+        filters: TaskFilters | None = None,
+    ) -> tuple[list[Task], int | None]:
         """Get all tasks.
 
         Args:
             user_id (UUID): The user owner ID of the task.
             page (int): The page number.
             page_size (int): The number of tasks per page.
+            count_mode (CountMode | None): How to compute the total, or None to
+                skip it.
+            filters (TaskFilters | None): The filters and sort order to apply.
+
+        Returns:
+            list[Task]: The list of tasks.
+            total[int | None]: The total number of tasks, if requested.
+
+        """
+        filters = filters or TaskFilters()
+        query = (
+            self._order(self._filter(select(Task), user_id, filters), filters)
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+        total = None
+        if count_mode is CountMode.EXACT:
+            return await self._get_page_with_total(query, user_id, page, filters)
+        result = await self.db.execute(query)
+        paginated_tasks = result.scalars().all()
+        if count_mode is CountMode.ESTIMATED:
+            total = await self.estimate_count(user_id, filters)
+        return list(paginated_tasks), total
+
+    async def _get_page_with_total(
+        self,
+        query: Select[tuple[Task]],
+        user_id: UUID,
+        page: int,
+        filters: TaskFilters,
+    ) -> tuple[list[Task], int]:
+        """Fetch a page and the full count in one statement.
+
+        The count comes from the task counters in a scalar subquery when they give
+        it, and from a window function over the matching tasks otherwise. An empty
+        page carries no count, so past the first page the total falls back to a
+        separate count query.
+        """
+        total_column: ColumnElement[Any]
+        if self._counted_by_counters(filters):
+            total_column = self._counters_total(user_id, filters).scalar_subquery()
+        else:
+            total_column = func.count().over()
+        result = await self.db.execute(query.add_columns(total_column.label("total")))
+        rows = result.all()
+        if rows:
+            # The sum of the counters comes back as a numeric
+            total = int(rows[0].total)
+        elif page == 1:
+            total = 0
+        else:
+            return [], await self.count(user_id, filters)
+        return [row.Task for row in rows], total
+
+    async def get_after(
+        self,
+        user_id: UUID,
+        after: tuple[Any, ...] | None,
+        limit: int,
+        filters: TaskFilters | None = None,
+    ) -> list[Task]:
+        """Get tasks following a keyset position in the requested order.
+
+        Args:
+            user_id (UUID): The user owner ID of the task.
+            after (tuple[Any, ...] | None): The sort keys of the last task already
+                seen, or None to start from the beginning.
+            limit (int): The maximum number of tasks to return.
+            filters (TaskFilters | None): The filters and sort order to apply.
 
         Returns:
             list[Task]: The list of tasks.
-            total[int]: The total number of tasks.
 
         """
-        query = select(Task).where(Task.user_id == user_id)
+        filters = filters or TaskFilters()
+        query = self._filter(select(Task), user_id, filters)
+        if after is not None:
+            keys = tuple_(*self.sort_keys(filters))
+            if filters.direction is SortDirection.DESC:
+                query = query.where(keys < tuple_(*after))
+            else:
+                query = query.where(keys > tuple_(*after))
+        result = await self.db.execute(self._order(query, filters).limit(limit))
+        return list(result.scalars().all())
+
+    async def stream_all(self, user_id: UUID, batch_size: int) -> AsyncIterator[Row]:
+        """Stream all the tasks of a user through a server-side cursor.
+
+        Rows are fetched `batch_size` at a time, so memory use does not grow with
+        the number of tasks. The stream reads through a session of its own, closed
+        once the stream ends, since the request's session is released before a
+        streamed response body is sent.
+
+        Args:
+            user_id (UUID): The user owner ID of the tasks.
+            batch_size (int): The number of rows fetched per round trip.
+
+        Yields:
+            Row: The task columns, ordered by creation.
+
+        """
+        async with self.sessions() as db:
+            result = await db.stream(
+                select(
+                    Task.id,
+                    Task.title,
+                    Task.description,
+                    Task.status,
+                    Task.created_at,
+                )
+                .where(Task.user_id == user_id)
+                .order_by(Task.created_at, Task.id)
+                .execution_options(yield_per=batch_size)
+            )
+            async for row in result:
+                yield row
+
+    async def search(
+        self,
+        user_id: UUID,
+        query: str,
+        after: tuple[float, UUID] | None,
+        limit: int,
+    ) -> list[tuple[Task, float]]:
+        """Search the tasks of a user by title and description, best matches first.
+
+        Args:
+            user_id (UUID): The user owner ID of the tasks.
+            query (str): The search terms, in web search syntax.
+            after (tuple[float, UUID] | None): The (rank, id) of the last task
+                already seen, or None to start from the best match.
+            limit (int): The maximum number of tasks to return.
+
+        Returns:
+            list[tuple[Task, float]]: The matching tasks with their rank.
+
+        """
+        tsquery = func.websearch_to_tsquery(
+            literal_column("'english'::regconfig"), query
+        )
+        search_vector = Task.__table__.c.search_vector
+        rank = cast(func.ts_rank(search_vector, tsquery), Float)
+        statement = select(Task, rank).where(
+            Task.user_id == user_id, search_vector.bool_op("@@")(tsquery)
+        )
+        if after is not None:
+            statement = statement.where(
+                or_(rank < after[0], and_(rank == after[0], Task.id > after[1]))
+            )
+        result = await self.db.execute(
+            statement.order_by(rank.desc(), Task.id).limit(limit)
+        )
+        return [(task, task_rank) for task, task_rank in result.all()]
+
+    async def get_stats(self, user_id: UUID) -> dict[TaskStatus, int]:
+        """Get the number of tasks of a user in each status.
+
+        Args:
+            user_id (UUID): The user owner ID of the tasks.
+
+        Returns:
+            dict[TaskStatus, int]: The task counts, read from the counters kept by
+            the tasks table triggers. Statuses without tasks may be missing.
+
+        """
         result = await self.db.execute(
-            query.offset((page - 1) * page_size).limit(page_size)
+            select(TaskCounter.status, TaskCounter.count).where(
+                TaskCounter.user_id == user_id
+            )
         )
-        total = await self.db.execute(
-            select(func.count()).select_from(Task).where(Task.user_id == user_id)
+        return {status: count for status, count in result.all()}
+
+    async def get_list_version(self, user_id: UUID) -> int:
+        """Get the version of the task listings of a user.
+
+        Args:
+            user_id (UUID): The user owner ID of the tasks.
+
+        Returns:
+            int: A value that changes whenever any task of the user is written, or 0
+            if none has been written yet.
+
+        """
+        version = await self.db.scalar(
+            select(TaskListVersion.version).where(TaskListVersion.user_id == user_id)
         )
-        paginated_tasks = result.scalars().all()
-        return list(paginated_tasks), total.scalar_one()
+        return version or 0
+
+    async def get_changes(
+        self, user_id: UUID, since: tuple[int, int], limit: int
+    ) -> tuple[list[Task], list[TaskTombstone]]:
+        """Get the tasks written and deleted after a position of the changes feed.
+
+        Positions are (transaction id, revision) pairs. Only rows written by
+        transactions older than every transaction still running are returned, so a
+        write that commits later always lands after the last position returned here.
+
+        Args:
+            user_id (UUID): The user owner ID of the tasks.
+            since (tuple[int, int]): The last position the client has already seen.
+            limit (int): The maximum number of tasks and of tombstones to return.
 
-    async def get_by_id(self, user_id: UUID, id: UUID) -> Task | None:
+        Returns:
+            list[Task]: The created or updated tasks, ordered by position.
+            list[TaskTombstone]: The tombstones of deleted tasks, ordered by position.
+
+        """
+        # Taken once, before both reads, so tasks and tombstones share one horizon
+        horizon = await self.db.scalar(
+            select(
+                cast(
+                    cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text),
+                    BigInteger,
+                )
+            )
+        )
+        tasks = await self.db.scalars(
+            select(Task)
+            .where(
+                Task.user_id == user_id,
+                Task.xact_id < horizon,
+                tuple_(Task.xact_id, Task.revision) > since,
+            )
+            .order_by(Task.xact_id, Task.revision)
+            .limit(limit)
+        )
+        tombstones = await self.db.scalars(
+            select(TaskTombstone)
+            .where(
+                TaskTombstone.user_id == user_id,
+                TaskTombstone.xact_id < horizon,
+                tuple_(TaskTombstone.xact_id, TaskTombstone.revision) > since,
+            )
+            .order_by(TaskTombstone.xact_id, TaskTombstone.revision)
+            .limit(limit)
+        )
+        return list(tasks.all()), list(tombstones.all())
+
+    async def get_by_id(self, user_id: UUID, id: UUID) -> Task:
         """Get a task by id.
 
         Args:
@@ -87,60 +508,170 @@ class TaskRepository:
         db_task = result.scalar_one_or_none()
 
         if not db_task:
-            logger.error(f"Task with id {id} not found")
+            logger.info(f"Task with id {id} not found")
             raise HTTPException(status_code=404, detail="Task not found")
         return db_task
 
-    async def update(self, id: UUID, user_id: UUID, task: UpdateTask) -> Task:
+    async def update(
+        self,
+        id: UUID,
+        user_id: UUID,
+        task: UpdateTask,
+        revisions: list[int] | None = None,
+    ) -> Task:
         """Update a task.
 
         Args:
             id (UUID): The id of the task.
             user_id (UUID): The id of the authenticated user
             task (UpdateTask): The task to update.
+            revisions (list[int] | None): If given, only update the task while its
+                revision is one of these.
 
         Returns:
             Task: The updated task.
 
         Raises:
-            HTTPException: If the task is not found.
+            HTTPException: If the task is not found, the new title already exists or
+            the task revision does not match.
 
         """
-        db_task = await self.get_by_id(id=id, user_id=user_id)
-        if not db_task:
-            logger.error(f"Task with id {id} not found")
-            raise HTTPException(status_code=404, detail="Task not found")
+        values = task.model_dump(exclude_none=True)
+        if not values:
+            current = await self.get_by_id(id=id, user_id=user_id)
+            if revisions is not None and current.revision not in revisions:
+                logger.info(f"Task with id {id} does not match the expected revision")
+                raise HTTPException(status_code=412, detail="Task was modified")
+            return current
+
+        query = update(Task).where(Task.id == id, Task.user_id == user_id)
+        if revisions is not None:
+            query = query.where(Task.revision.in_(revisions))
+        try:
+            result = await self.db.scalars(
+                query.values(
+                    **values,
+                    revision=task_revision_seq.next_value(),
+                    xact_id=CURRENT_XACT_ID,
+                )
+                .returning(Task)
+                .execution_options(populate_existing=True)
+            )
+            db_task = result.one_or_none()
+        except IntegrityError:
+            await self.db.rollback()
+            logger.info(f"There is a task with the same title {task.title}")
+            raise HTTPException(status_code=400, detail="Task already exists")
 
-        if task.title is not None:
-            db_task.title = task.title
-        if task.description is not None:
-            db_task.description = task.description
-        if task.status is not None:
-            db_task.status = task.status
+        if not db_task:
+            await self.db.rollback()
+            await self._raise_missing_or_modified(id=id, user_id=user_id)
 
         await self.db.commit()
-        await self.db.refresh(db_task)
         return db_task
 
-    async def delete(self, user_id: UUID, id: UUID):
+    async def delete(self, user_id: UUID, id: UUID, revisions: list[int] | None = None):
         """Delete a task.
 
         Args:
             user_id (UUID): The id of the authenticated user
             id (str): The id of the task.
+            revisions (list[int] | None): If given, only delete the task while its
+                revision is one of these.
 
         Returns:
-            Task: The deleted task.
+            UUID: The id of the deleted task.
 
         Raises:
-            HTTPException: If the task is not found.
+            HTTPException: If the task is not found or its revision does not match.
 
         """
-        db_task = await self.get_by_id(id=id, user_id=user_id)
-        if not db_task:
-            logger.error(f"Task with id {id} not found")
-            raise HTTPException(status_code=404, detail="Task not found")
+        query = delete(Task).where(Task.id == id, Task.user_id == user_id)
+        if revisions is not None:
+            query = query.where(Task.revision.in_(revisions))
+        deleted_ids = await self._delete_leaving_tombstones(query)
+
+        if not deleted_ids:
+            await self.db.rollback()
+            await self._raise_missing_or_modified(id=id, user_id=user_id)
 
-        await self.db.delete(db_task)
         await self.db.commit()
-        return db_task
+        return deleted_ids[0]
+
+    async def _delete_leaving_tombstones(self, query: Delete) -> list[UUID]:
+        """Run a task DELETE and record a tombstone per deleted row, in one statement.
+
+        Args:
+            query (Delete): The DELETE statement, without RETURNING.
+
+        Returns:
+            list[UUID]: The ids of the deleted tasks.
+
+        """
+        deleted = query.returning(Task.id, Task.user_id).cte("deleted_tasks")
+        result = await self.db.scalars(
+            insert(TaskTombstone)
+            .from_select(["id", "user_id"], select(deleted.c.id, deleted.c.user_id))
+            .add_cte(deleted)
+            .returning(TaskTombstone.id)
+        )
+        return list(result.all())
+
+    async def _raise_missing_or_modified(self, id: UUID, user_id: UUID) -> NoReturn:
+        """Explain why a conditional write matched no row.
+
+        Raises:
+            HTTPException: 404 if the task does not exist, 412 otherwise.
+
+        """
+        await self.get_by_id(id=id, user_id=user_id)
+        logger.info(f"Task with id {id} does not match the expected revision")
+        raise HTTPException(status_code=412, detail="Task was modified")
+
+    async def update_many(self, user_id: UUID, changes: BulkUpdateTasks) -> list[Task]:
+        """Apply the same changes to several tasks with a single UPDATE.
+
+        Args:
+            user_id (UUID): The id of the authenticated user
+            changes (BulkUpdateTasks): The ids of the tasks and the changes to apply.
+
+        Returns:
+            list[Task]: The updated tasks. Ids that do not exist or belong to another
+            user are left out.
+
+        """
+        values = changes.model_dump(
+            include={"description", "status"}, exclude_none=True
+        )
+        result = await self.db.scalars(
+            update(Task)
+            .where(Task.user_id == user_id, Task.id.in_(changes.ids))
+            .values(
+                **values,
+                revision=task_revision_seq.next_value(),
+                xact_id=CURRENT_XACT_ID,
+            )
+            .returning(Task)
+            .execution_options(populate_existing=True)
+        )
+        db_tasks = list(result.all())
+        await self.db.commit()
+        return db_tasks
+
+    async def delete_many(self, user_id: UUID, ids: list[UUID]) -> list[UUID]:
+        """Delete several tasks with a single DELETE, leaving tombstones behind.
+
+        Args:
+            user_id (UUID): The id of the authenticated user
+            ids (list[UUID]): The ids of the tasks.
+
+        Returns:
+            list[UUID]: The ids of the deleted tasks. Ids that do not exist or belong
+            to another user are left out.
+
+        """
+        deleted_ids = await self._delete_leaving_tombstones(
+            delete(Task).where(Task.user_id == user_id, Task.id.in_(ids))
+        )
+        await self.db.commit()
+        return deleted_ids
@@ -1,70 +1,284 @@
+from datetime import datetime
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Body, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from src.common.pagination import PaginatedResponse
-from src.modules.auth.dependencies import get_current_user
+from src.common.conditional import etag_matches, make_etag
+from src.common.pagination import (
+    CountMode,
+    CursorPaginatedResponse,
+    PaginatedResponse,
+    SortDirection,
+)
+from src.core.config import settings
+from src.core.profiling import ProfiledRoute
+from src.modules.auth.dependencies import get_current_principal
+from src.modules.auth.service import Principal
 from src.modules.tasks.dependencies import get_task_service
-from src.modules.tasks.dto import CreateTask, UpdateTask
-from src.modules.tasks.schema import ReadTask
+from src.modules.tasks.dto import (
+    BulkDeleteTasks,
+    BulkUpdateTasks,
+    CreateTask,
+    TaskFilters,
+    TaskSortField,
+    UpdateTask,
+)
+from src.modules.tasks.model import TaskStatus
+from src.modules.tasks.schema import (
+    BulkCreateResult,
+    BulkDeleteResult,
+    BulkUpdateResult,
+    ImportResult,
+    ReadTask,
+    TaskChanges,
+    TaskFileFormat,
+    TaskStats,
+)
 from src.modules.tasks.service import TaskService
-from src.modules.users.model import User
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("", response_model=ReadTask)
 async def create_task(
     task: CreateTask,
     tasks_service: TaskService = Depends(get_task_service),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
     return await tasks_service.create(user=user, task=task)
 
 
-@router.get("", response_model=PaginatedResponse[ReadTask])
+@router.post("/bulk", response_model=BulkCreateResult)
+async def create_tasks(
+    tasks: Annotated[
+        list[CreateTask],
+        Body(min_length=1, max_length=settings.TASKS_BULK_MAX_ITEMS),
+    ],
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    return await tasks_service.create_many(user=user, tasks=tasks)
+
+
+@router.patch("/bulk", response_model=BulkUpdateResult)
+async def update_tasks(
+    changes: BulkUpdateTasks,
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    return await tasks_service.update_many(user=user, changes=changes)
+
+
+@router.delete("/bulk", response_model=BulkDeleteResult)
+async def delete_tasks(
+    tasks: BulkDeleteTasks,
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    return await tasks_service.delete_many(user=user, tasks=tasks)
+
+
+@router.get(
+    "",
+    response_model=PaginatedResponse[ReadTask] | CursorPaginatedResponse[ReadTask],
+)
 async def get_tasks(
     page: int = Query(1, ge=1, description="Page number starting from 1"),
     page_size: int = Query(
         10, ge=1, le=100, description="Number of items per page (max 100)"
     ),
+    cursor: str | None = Query(
+        None,
+        description="Switches to keyset pagination: pass an empty value for the "
+        "first page, then the next_cursor of the previous response",
+    ),
+    include_total: bool = Query(
+        True, description="Count the total number of tasks (offset pagination only)"
+    ),
+    count_mode: CountMode = Query(
+        CountMode.EXACT,
+        description="Exact count, or a cheap estimate from planner statistics",
+    ),
+    status: TaskStatus | None = Query(None, description="Only tasks in this status"),
+    created_after: datetime | None = Query(
+        None, description="Only tasks created after this time"
+    ),
+    created_before: datetime | None = Query(
+        None, description="Only tasks created before this time"
+    ),
+    sort: TaskSortField = Query(TaskSortField.CREATED_AT, description="Sort field"),
+    direction: SortDirection = Query(SortDirection.ASC, description="Sort direction"),
+    if_none_match: str | None = Header(None),
     tasks_service: TaskService = Depends(get_task_service),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
-    tasks, total = await tasks_service.get_all(
-        user=user, page=page, page_size=page_size
-    )
-    return PaginatedResponse.create(
-        items=tasks,
-        total=total,
+    body = await tasks_service.get_listing(
+        user=user,
         page=page,
         page_size=page_size,
+        cursor=cursor,
+        count_mode=count_mode if include_total else None,
+        filters=TaskFilters(
+            status=status,
+            created_after=created_after,
+            created_before=created_before,
+            sort=sort,
+            direction=direction,
+        ),
+    )
+    etag = make_etag(body)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@router.get("/search", response_model=CursorPaginatedResponse[ReadTask])
+async def search_tasks(
+    q: str = Query(
+        ...,
+        min_length=1,
+        max_length=200,
+        description='Search terms; supports "quoted phrases", or and -excluded',
+    ),
+    page_size: int = Query(
+        10, ge=1, le=100, description="Number of items per page (max 100)"
+    ),
+    cursor: str | None = Query(
+        None, description="next_cursor of the previous response"
+    ),
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    return await tasks_service.search(
+        user=user, query=q, cursor=cursor, page_size=page_size
+    )
+
+
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats(
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    return await tasks_service.get_stats(user=user)
+
+
+@router.get("/changes", response_model=TaskChanges)
+async def get_task_changes(
+    since: str | None = Query(
+        None,
+        description="next_token of the previous response; omit it for a full sync",
+    ),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum changes to return"),
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    return await tasks_service.get_changes(user=user, since=since, limit=limit)
+
+
+@router.post(
+    "/import",
+    response_model=ImportResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_tasks(
+    request: Request,
+    format: TaskFileFormat = Query(TaskFileFormat.NDJSON, description="File format"),
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    return await tasks_service.import_tasks(
+        user=user, chunks=request.stream(), file_format=format
+    )
+
+
+EXPORT_MEDIA_TYPES = {
+    TaskFileFormat.NDJSON: "application/x-ndjson",
+    TaskFileFormat.CSV: "text/csv",
+}
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}
+    },
+)
+async def export_tasks(
+    format: TaskFileFormat = Query(TaskFileFormat.NDJSON, description="File format"),
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    return StreamingResponse(
+        tasks_service.export(user=user, file_format=format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_task_events(
+    tasks_service: TaskService = Depends(get_task_service),
+    user: Principal = Depends(get_current_principal),
+):
+    events = await tasks_service.stream_events(user=user)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
 @router.get("/{task_id}", response_model=ReadTask)
 async def get_task(
     task_id: UUID,
+    response: Response,
+    if_none_match: str | None = Header(None),
     tasks_service: TaskService = Depends(get_task_service),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
-    return await tasks_service.get_by_id(user=user, task_id=task_id)
+    task, etag = await tasks_service.get_by_id(user=user, task_id=task_id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return task
 
 
 @router.put("/{task_id}", response_model=ReadTask)
 async def update_task(
     task_id: UUID,
     task: UpdateTask,
+    response: Response,
+    if_match: str | None = Header(None),
     tasks_service: TaskService = Depends(get_task_service),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
-    return await tasks_service.update(user=user, task_id=task_id, task=task)
+    updated_task, etag = await tasks_service.update(
+        user=user, task_id=task_id, task=task, if_match=if_match
+    )
+    response.headers["ETag"] = etag
+    return updated_task
 
 
 @router.delete("/{task_id}")
 async def delete_task(
     task_id: UUID,
+    if_match: str | None = Header(None),
     tasks_service: TaskService = Depends(get_task_service),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
-    return await tasks_service.delete(user=user, task_id=task_id)
+    return await tasks_service.delete(user=user, task_id=task_id, if_match=if_match)
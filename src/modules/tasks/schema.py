@@ -1,3 +1,4 @@
+import enum
 from datetime import datetime
 from uuid import UUID
 
@@ -18,3 +19,64 @@ class ReadTask(BaseModel):
 
 class ReadTasks(BaseModel):
     tasks: list[ReadTask]
+
+
+class TaskFileFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class BulkCreateStatus(str, enum.Enum):
+    CREATED = "CREATED"
+    DUPLICATE = "DUPLICATE"
+
+
+class BulkCreateItem(BaseModel):
+    index: int
+    status: BulkCreateStatus
+    task: ReadTask | None = None
+
+
+class BulkCreateResult(BaseModel):
+    created: int
+    duplicates: int
+    items: list[BulkCreateItem]
+
+
+class BulkUpdateResult(BaseModel):
+    items: list[ReadTask]
+    missing_ids: list[UUID]
+
+
+class BulkDeleteResult(BaseModel):
+    deleted_ids: list[UUID]
+    missing_ids: list[UUID]
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    inserted: int
+    duplicates: int
+    invalid: int
+    errors: list[ImportRowError]
+
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: dict[TaskStatus, int]
+
+
+class TaskChange(BaseModel):
+    id: UUID
+    deleted: bool
+    task: ReadTask | None = None
+
+
+class TaskChanges(BaseModel):
+    changes: list[TaskChange]
+    next_token: str
+    has_more: bool
@@ -1,42 +1,507 @@
+import asyncio
+import csv
+import io
+import json
+from collections.abc import AsyncGenerator, AsyncIterable, AsyncIterator
+from datetime import datetime
+from typing import Any
 from uuid import UUID
 
-from src.core.logging import audit
-from src.modules.tasks.dto import CreateTask, UpdateTask
+import asyncpg  # type: ignore[import-untyped]
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from src.common.conditional import parse_etags
+from src.common.pagination import (
+    CountMode,
+    CursorPaginatedResponse,
+    PaginatedResponse,
+    decode_cursor,
+    encode_cursor,
+)
+from src.common.records import read_csv_records, read_lines
+from src.core.audit import audit
+from src.core.config import settings
+from src.core.logging import logger
+from src.core.tracing import traced
+from src.modules.auth.service import Principal
+from src.modules.tasks.cache import (
+    TaskCache,
+    TaskListCache,
+    task_cache,
+    task_list_cache,
+)
+from src.modules.tasks.dto import (
+    BulkDeleteTasks,
+    BulkUpdateTasks,
+    CreateTask,
+    TaskFilters,
+    TaskSortField,
+    UpdateTask,
+)
+from src.modules.tasks.events import RESYNC, TaskEventBroker, task_event_broker
+from src.modules.tasks.model import TaskStatus
 from src.modules.tasks.repository import TaskRepository
-from src.modules.tasks.schema import ReadTask
-from src.modules.users.model import User
+from src.modules.tasks.schema import (
+    BulkCreateItem,
+    BulkCreateResult,
+    BulkCreateStatus,
+    BulkDeleteResult,
+    BulkUpdateResult,
+    ImportResult,
+    ImportRowError,
+    ReadTask,
+    TaskChange,
+    TaskChanges,
+    TaskFileFormat,
+    TaskStats,
+)
+
+
+def task_etag(revision: int) -> str:
+    return f'"{revision}"'
+
+
+def parse_revisions(if_match: str | None) -> list[int] | None:
+    """Turn an If-Match header into the task revisions it accepts.
 
+    Returns None when any revision is acceptable (no header, or "*"). Entity tags
+    that are not task revisions can never match, so they are dropped, and so are
+    weak tags, which the strong comparison of If-Match never matches.
+    """
+    tags = parse_etags(if_match)
+    if not tags or "*" in tags:
+        return None
+    return [int(tag[1:-1]) for tag in tags if tag[1:-1].isdigit()]
 
+
+@traced
 class TaskService:
-    def __init__(self, repository: TaskRepository):
+    def __init__(
+        self,
+        repository: TaskRepository,
+        cache: TaskCache = task_cache,
+        list_cache: TaskListCache = task_list_cache,
+        events: TaskEventBroker = task_event_broker,
+    ):
         self.repository = repository
+        self.cache = cache
+        self.list_cache = list_cache
+        self.events = events
 
-    async def create(self, user: User, task: CreateTask) -> ReadTask:
+    async def create(self, user: Principal, task: CreateTask) -> ReadTask:
         db_task = await self.repository.create(user_id=user.id, task=task)
-        audit(f"Task with title {task.title} created for user {user.id}")
+        audit("task.create", user.id, task_id=db_task.id)
         return ReadTask.model_validate(db_task)
 
+    async def create_many(
+        self, user: Principal, tasks: list[CreateTask]
+    ) -> BulkCreateResult:
+        db_tasks = await self.repository.create_many(user_id=user.id, tasks=tasks)
+        items = [
+            (
+                BulkCreateItem(
+                    index=index,
+                    status=BulkCreateStatus.CREATED,
+                    task=ReadTask.model_validate(db_task),
+                )
+                if db_task is not None
+                else BulkCreateItem(index=index, status=BulkCreateStatus.DUPLICATE)
+            )
+            for index, db_task in enumerate(db_tasks)
+        ]
+        created = sum(item.status is BulkCreateStatus.CREATED for item in items)
+        audit("task.bulk_create", user.id, count=created)
+        return BulkCreateResult(
+            created=created, duplicates=len(items) - created, items=items
+        )
+
+    async def import_tasks(
+        self,
+        user: Principal,
+        chunks: AsyncIterable[bytes],
+        file_format: TaskFileFormat,
+    ) -> ImportResult:
+        """Create tasks from an NDJSON or CSV body as it is received.
+
+        Valid rows are inserted and committed `TASKS_IMPORT_CHUNK_SIZE` at a time,
+        so a failed import keeps the chunks loaded before the failure.
+        """
+        result = ImportResult(inserted=0, duplicates=0, invalid=0, errors=[])
+        chunk: list[CreateTask] = []
+        async for line, row in self._read_rows(chunks, file_format):
+            try:
+                if isinstance(row, ValueError):
+                    raise row
+                if not isinstance(row, dict):
+                    raise ValueError("Row must be an object")
+                chunk.append(CreateTask.model_validate(row))
+            except ValidationError as error:
+                first = error.errors()[0]
+                field = ".".join(map(str, first["loc"]))
+                self._reject_row(result, line, f"{field}: {first['msg']}")
+            except ValueError as error:
+                self._reject_row(result, line, str(error))
+            if len(chunk) == settings.TASKS_IMPORT_CHUNK_SIZE:
+                await self._import_chunk(user, chunk, result)
+                chunk = []
+        if chunk:
+            await self._import_chunk(user, chunk, result)
+        audit(
+            "task.import",
+            user.id,
+            format=file_format.value,
+            inserted=result.inserted,
+            duplicates=result.duplicates,
+            invalid=result.invalid,
+        )
+        return result
+
+    async def _read_rows(
+        self, chunks: AsyncIterable[bytes], file_format: TaskFileFormat
+    ) -> AsyncIterator[tuple[int, Any]]:
+        """Parse rows by line number, yielding a ValueError for unreadable ones."""
+        max_length = settings.TASKS_IMPORT_MAX_LINE_LENGTH
+        if file_format is TaskFileFormat.NDJSON:
+            async for line, text in read_lines(chunks, max_length):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except ValueError:
+                        yield line, ValueError("Invalid JSON")
+            return
+        header: list[str] | None = None
+        async for line, fields in read_csv_records(chunks, max_length):
+            if header is None:
+                header = fields
+            elif len(fields) != len(header):
+                yield line, ValueError(
+                    f"Expected {len(header)} fields, got {len(fields)}"
+                )
+            else:
+                # Empty CSV fields stand for missing values
+                yield line, {key: value for key, value in zip(header, fields) if value}
+
+    def _reject_row(self, result: ImportResult, line: int, detail: str) -> None:
+        result.invalid += 1
+        if len(result.errors) < settings.TASKS_IMPORT_MAX_ERRORS:
+            result.errors.append(ImportRowError(line=line, detail=detail))
+
+    async def _import_chunk(
+        self, user: Principal, chunk: list[CreateTask], result: ImportResult
+    ) -> None:
+        db_tasks = await self.repository.create_many(user_id=user.id, tasks=chunk)
+        duplicates = db_tasks.count(None)
+        result.inserted += len(db_tasks) - duplicates
+        result.duplicates += duplicates
+
+    async def get_listing(
+        self,
+        user: Principal,
+        page: int,
+        page_size: int,
+        cursor: str | None,
+        count_mode: CountMode | None,
+        filters: TaskFilters | None = None,
+    ) -> bytes:
+        """Return the encoded GET /tasks response, reusing a cached encoding when
+        none of the user's tasks changed since it was built."""
+        filters = filters or TaskFilters()
+        params = {
+            "page": page,
+            "page_size": page_size,
+            "cursor": cursor,
+            "count_mode": count_mode.value if count_mode else None,
+            **filters.model_dump(mode="json"),
+        }
+        # Read once: a write landing while the listing is built bumps the version,
+        # and the listing must not be stored under the version that follows it
+        version = await self.repository.get_list_version(user.id)
+        body = await self.list_cache.get(user.id, version, params)
+        if body is not None:
+            audit("task.list", user.id, read=True)
+            return body
+
+        response: PaginatedResponse[ReadTask] | CursorPaginatedResponse[ReadTask]
+        if cursor is not None:
+            tasks, next_cursor = await self.get_page(
+                user=user, cursor=cursor, page_size=page_size, filters=filters
+            )
+            response = CursorPaginatedResponse[ReadTask].create(
+                items=tasks, page_size=page_size, next_cursor=next_cursor
+            )
+        else:
+            tasks, total = await self.get_all(
+                user=user,
+                page=page,
+                page_size=page_size,
+                count_mode=count_mode,
+                filters=filters,
+            )
+            response = PaginatedResponse[ReadTask].create(
+                items=tasks, total=total, page=page, page_size=page_size
+            )
+        body = response.model_dump_json().encode()
+        await self.list_cache.set(user.id, version, params, body)
+        return body
+
     async def get_all(
-        self, user: User, page: int, page_size: int
-    ) -> tuple[list[ReadTask], int]:
+        self,
+        user: Principal,
+        page: int,
+        page_size: int,
+        count_mode: CountMode | None = CountMode.EXACT,
+        filters: TaskFilters | None = None,
+    ) -> tuple[list[ReadTask], int | None]:
         tasks, total = await self.repository.get_all(
-            user_id=user.id, page=page, page_size=page_size
+            user_id=user.id,
+            page=page,
+            page_size=page_size,
+            count_mode=count_mode,
+            filters=filters,
         )
-        audit(f"User {user.id} retrieved all its tasks")
+        audit("task.list", user.id, read=True)
         return [ReadTask.model_validate(task) for task in tasks], total
 
-    async def get_by_id(self, user: User, task_id: UUID) -> ReadTask:
-        audit(f"User {user.id} retrieved task with id {task_id}")
+    async def get_page(
+        self,
+        user: Principal,
+        cursor: str | None,
+        page_size: int,
+        filters: TaskFilters | None = None,
+    ) -> tuple[list[ReadTask], str | None]:
+        filters = filters or TaskFilters()
+        after: tuple[Any, ...] | None = None
+        if cursor:
+            try:
+                if filters.sort is TaskSortField.TITLE:
+                    (title,) = decode_cursor(cursor)
+                    after = (str(title),)
+                else:
+                    created_at, task_id = decode_cursor(cursor)
+                    after = (datetime.fromisoformat(created_at), UUID(task_id))
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        # Fetch one extra row to know whether another page follows
+        tasks = await self.repository.get_after(
+            user_id=user.id, after=after, limit=page_size + 1, filters=filters
+        )
+        audit("task.list", user.id, read=True)
+        next_cursor = None
+        if len(tasks) > page_size:
+            tasks = tasks[:page_size]
+            last = tasks[-1]
+            if filters.sort is TaskSortField.TITLE:
+                next_cursor = encode_cursor([last.title])
+            else:
+                next_cursor = encode_cursor([last.created_at.isoformat(), str(last.id)])
+        return [ReadTask.model_validate(task) for task in tasks], next_cursor
+
+    async def search(
+        self, user: Principal, query: str, cursor: str | None, page_size: int
+    ) -> CursorPaginatedResponse[ReadTask]:
+        after = None
+        if cursor:
+            try:
+                rank, task_id = decode_cursor(cursor)
+                after = (float(rank), UUID(task_id))
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        results = await self.repository.search(
+            user_id=user.id, query=query, after=after, limit=page_size + 1
+        )
+        audit("task.search", user.id, read=True)
+        next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            last, rank = results[-1]
+            next_cursor = encode_cursor([rank, str(last.id)])
+        return CursorPaginatedResponse[ReadTask].create(
+            items=[ReadTask.model_validate(task) for task, _ in results],
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
+
+    async def get_stats(self, user: Principal) -> TaskStats:
+        counts = await self.repository.get_stats(user_id=user.id)
+        audit("task.stats", user.id, read=True)
+        by_status = {status: counts.get(status, 0) for status in TaskStatus}
+        return TaskStats(total=sum(by_status.values()), by_status=by_status)
+
+    async def get_changes(
+        self, user: Principal, since: str | None, limit: int
+    ) -> TaskChanges:
+        after = (0, 0)
+        position = decode_cursor(since) if since else []
+        if len(position) == 1 and isinstance(position[0], int):
+            # Tokens issued before positions carried a transaction id cannot be
+            # resumed exactly, so they restart a full sync
+            position = []
+        if position:
+            if len(position) != 2 or not all(isinstance(v, int) for v in position):
+                raise HTTPException(status_code=400, detail="Invalid sync token")
+            after = (position[0], position[1])
+        tasks, tombstones = await self.repository.get_changes(
+            user_id=user.id, since=after, limit=limit + 1
+        )
+        audit("task.changes", user.id, read=True)
+        changes = sorted(
+            [
+                (
+                    (task.xact_id, task.revision),
+                    TaskChange(
+                        id=task.id, deleted=False, task=ReadTask.model_validate(task)
+                    ),
+                )
+                for task in tasks
+            ]
+            + [
+                (
+                    (tombstone.xact_id, tombstone.revision),
+                    TaskChange(id=tombstone.id, deleted=True),
+                )
+                for tombstone in tombstones
+            ],
+            key=lambda change: change[0],
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if changes:
+            after = changes[-1][0]
+        return TaskChanges(
+            changes=[change for _, change in changes],
+            next_token=encode_cursor(list(after)),
+            has_more=has_more,
+        )
+
+    async def stream_events(self, user: Principal) -> AsyncGenerator[str, None]:
+        """Subscribe to the task changes of a user as server-sent events.
+
+        The subscription is made before returning, so a broken events connection
+        surfaces as an error response instead of an empty stream.
+
+        Raises:
+            HTTPException: If the task events listener can not be started.
+        """
+        try:
+            queue = await self.events.subscribe(user.id)
+        except (OSError, asyncpg.PostgresError) as error:
+            logger.error(f"Could not start the task events listener: {error}")
+            raise HTTPException(status_code=503, detail="Task events unavailable")
+        audit("task.stream", user.id, read=True)
+        return self._event_frames(user, queue)
+
+    async def _event_frames(
+        self, user: Principal, queue: asyncio.Queue
+    ) -> AsyncGenerator[str, None]:
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.TASK_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment frames keep proxies from closing an idle stream and
+                    # reveal disconnected clients
+                    yield ": keepalive\n\n"
+                    continue
+                if event is RESYNC:
+                    yield "event: resync\ndata: {}\n\n"
+                    continue
+                data = json.dumps({"id": event["id"], "revision": event["revision"]})
+                yield f"event: {event['op']}\ndata: {data}\n\n"
+        finally:
+            self.events.unsubscribe(user.id, queue)
+
+    async def export(
+        self, user: Principal, file_format: TaskFileFormat
+    ) -> AsyncIterator[bytes]:
+        """Encode all the tasks of a user as NDJSON or CSV, one chunk per batch."""
+        audit("task.export", user.id, format=file_format.value)
+        batch_size = settings.TASKS_EXPORT_BATCH_SIZE
+        rows = self.repository.stream_all(user_id=user.id, batch_size=batch_size)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if file_format is TaskFileFormat.CSV:
+            writer.writerow(ReadTask.model_fields)
+        count = 0
+        async for row in rows:
+            task = ReadTask.model_validate(row)
+            if file_format is TaskFileFormat.CSV:
+                writer.writerow(task.model_dump(mode="json").values())
+            else:
+                buffer.write(task.model_dump_json())
+                buffer.write("\n")
+            count += 1
+            if count % batch_size == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    async def get_by_id(self, user: Principal, task_id: UUID) -> tuple[ReadTask, str]:
+        audit("task.read", user.id, read=True, task_id=task_id)
+        cached = await self.cache.get(user_id=user.id, task_id=task_id)
+        if cached is not None:
+            return cached.task, task_etag(cached.revision)
+        generation = self.cache.generation(user_id=user.id, task_id=task_id)
         task = await self.repository.get_by_id(user_id=user.id, id=task_id)
-        return ReadTask.model_validate(task)
+        read_task = ReadTask.model_validate(task)
+        await self.cache.set(
+            user_id=user.id,
+            task=read_task,
+            revision=task.revision,
+            generation=generation,
+        )
+        return read_task, task_etag(task.revision)
 
-    async def update(self, user: User, task_id: UUID, task: UpdateTask) -> ReadTask:
-        audit(f"User {user.id} updated task with id {task_id}")
+    async def update(
+        self,
+        user: Principal,
+        task_id: UUID,
+        task: UpdateTask,
+        if_match: str | None = None,
+    ) -> tuple[ReadTask, str]:
+        audit("task.update", user.id, task_id=task_id)
         updated_task = await self.repository.update(
-            user_id=user.id, id=task_id, task=task
+            user_id=user.id,
+            id=task_id,
+            task=task,
+            revisions=parse_revisions(if_match),
         )
-        return ReadTask.model_validate(updated_task)
+        await self.cache.invalidate(user.id, task_id)
+        return ReadTask.model_validate(updated_task), task_etag(updated_task.revision)
 
-    async def delete(self, user: User, task_id: UUID) -> None:
-        audit(f"User {user.id} deleted task with id {task_id}")
-        await self.repository.delete(user_id=user.id, id=task_id)
+    async def delete(
+        self, user: Principal, task_id: UUID, if_match: str | None = None
+    ) -> None:
+        audit("task.delete", user.id, task_id=task_id)
+        await self.repository.delete(
+            user_id=user.id, id=task_id, revisions=parse_revisions(if_match)
+        )
+        await self.cache.invalidate(user.id, task_id)
+
+    async def update_many(
+        self, user: Principal, changes: BulkUpdateTasks
+    ) -> BulkUpdateResult:
+        audit("task.bulk_update", user.id, count=len(changes.ids))
+        db_tasks = await self.repository.update_many(user_id=user.id, changes=changes)
+        await self.cache.invalidate(user.id, *changes.ids)
+        found = {db_task.id for db_task in db_tasks}
+        return BulkUpdateResult(
+            items=[ReadTask.model_validate(db_task) for db_task in db_tasks],
+            missing_ids=[id for id in dict.fromkeys(changes.ids) if id not in found],
+        )
+
+    async def delete_many(
+        self, user: Principal, tasks: BulkDeleteTasks
+    ) -> BulkDeleteResult:
+        audit("task.bulk_delete", user.id, count=len(tasks.ids))
+        deleted_ids = await self.repository.delete_many(user_id=user.id, ids=tasks.ids)
+        await self.cache.invalidate(user.id, *deleted_ids)
+        found = set(deleted_ids)
+        return BulkDeleteResult(
+            deleted_ids=deleted_ids,
+            missing_ids=[id for id in dict.fromkeys(tasks.ids) if id not in found],
+        )
@@ -16,6 +16,8 @@ if TYPE_CHECKING:
 
 class User(Base):
     __tablename__ = "users"
+    # Fetch server defaults such as created_at with RETURNING on flush
+    __mapper_args__ = {"eager_defaults": True}
     id: Mapped[TypedUUID] = mapped_column(
         UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4())
     )
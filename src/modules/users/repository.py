@@ -2,29 +2,35 @@ from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.logging import logger
+from src.core.tracing import traced
 from src.modules.users.dto import UserDto
 from src.modules.users.model import User
 
 
+@traced
 class UserRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def create(self, user: UserDto) -> User:
-        result = await self.db.execute(select(User).where(User.email == user.email))
-        db_user = result.scalar_one_or_none()
+        result = await self.db.scalars(
+            pg_insert(User)
+            .values(email=user.email, hashed_password=user.hashed_password)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User)
+        )
+        db_user = result.one_or_none()
 
-        if db_user:
-            logger.error(f"User with email {user.email} already exists")
+        if not db_user:
+            await self.db.rollback()
+            logger.info(f"User with email {user.email} already exists")
             raise HTTPException(status_code=400, detail="User already exists")
 
-        db_user = User(email=user.email, hashed_password=user.hashed_password)
-        self.db.add(db_user)
         await self.db.commit()
-        await self.db.refresh(db_user)
         return db_user
 
     async def get_all(self) -> list[User]:
@@ -34,7 +40,7 @@ class UserRepository:
     async def get_by_id(self, id: UUID) -> User:
         db_user = await self.db.get(User, id)
         if not db_user:
-            logger.error(f"User with id {id} not found")
+            logger.info(f"User with id {id} not found")
             raise HTTPException(status_code=404, detail="User not found")
         return db_user
 
@@ -43,6 +49,6 @@ class UserRepository:
         db_user = result.scalar_one_or_none()
 
         if not db_user:
-            logger.error(f"User with email {email} not found")
+            logger.info(f"User with email {email} not found")
             raise HTTPException(status_code=404, detail="User not found")
         return db_user
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends
 
+from src.core.profiling import ProfiledRoute
 from src.modules.users.dependencies import get_user_service
 from src.modules.users.dto import CreateUser
 from src.modules.users.service import UserService
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("")
@@ -1,10 +1,12 @@
-from src.core.logging import audit
+from src.core.audit import audit
+from src.core.tracing import traced
 from src.modules.auth.repository import AuthRepository
 from src.modules.users.dto import CreateUser, UserDto
 from src.modules.users.model import User
 from src.modules.users.repository import UserRepository
 
 
+@traced
 class UserService:
     def __init__(
         self, user_repository: UserRepository, auth_repository: AuthRepository
@@ -13,7 +15,7 @@ class UserService:
         self.auth_repository = auth_repository
 
     async def create(self, user: CreateUser) -> User:
-        audit(f"User {user.email} created")
+        audit("user.create", user.email)
         hashed_password = await self.auth_repository.get_password_hash(
             password=user.password
         )
@@ -21,5 +23,5 @@ class UserService:
         return await self.user_repository.create(user_dto)
 
     async def get_all(self) -> list[User]:
-        audit("All users retrieved")
+        audit("user.list", None, read=True)
         return await self.user_repository.get_all()
@@ -1,6 +1,7 @@
 import pytest
 from httpx import AsyncClient
 
+from src.modules.auth.repository import password_hash_executor
 from src.modules.users.model import User
 
 
@@ -19,3 +20,15 @@ async def test_nonexistent_email_login(db_user: User, client: AsyncClient):
         json={"email": "nonexistent@example.com", "password": "wrongpassword"},
     )
     assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_login_hashing_pool_saturated(
+    db_user: User, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(password_hash_executor, "max_pending", 0)
+    response = await client.post(
+        "/auth/login", json={"email": db_user.email, "password": "wrongpassword"}
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
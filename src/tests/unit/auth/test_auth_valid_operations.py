@@ -1,8 +1,16 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.config import settings
+from src.modules.auth.model import RevokedToken
+from src.modules.auth.service import token_cache, token_hash
 from src.modules.users.model import User
-from src.tests.unit.conftest import TEST_USER_PASSWORD
+from src.tests.unit.conftest import TEST_USER_PASSWORD, create_test_token
 
 
 @pytest.mark.asyncio
@@ -11,3 +19,65 @@ async def test_login(db_user: User, client: AsyncClient):
         "/auth/login", json={"email": db_user.email, "password": TEST_USER_PASSWORD}
     )
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_authenticated_requests_use_token_cache(
+    db_user: User, client: AsyncClient
+):
+    headers = {"Authorization": f"Bearer {create_test_token(db_user)}"}
+    hits = token_cache.hits
+
+    first_response = await client.get("/tasks", headers=headers)
+    second_response = await client.get("/tasks", headers=headers)
+
+    assert first_response.status_code == 200
+    assert second_response.status_code == 200
+    assert token_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_token(db_user: User, client: AsyncClient):
+    headers = {"Authorization": f"Bearer {create_test_token(db_user)}"}
+
+    response = await client.post("/auth/logout", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get("/tasks", headers=headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_logout_is_shared_between_workers(
+    db_user: User, db: AsyncSession, client: AsyncClient
+):
+    expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+    db.add(RevokedToken(token_hash="0" * 64, expires_at=expired))
+    await db.commit()
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/auth/logout", headers=headers)
+    assert response.status_code == 200
+
+    revoked = (await db.scalars(select(RevokedToken.token_hash))).all()
+    assert revoked == [token_hash(token)]
+    # Another worker has not cached the token, so it finds the stored revocation
+    token_cache.clear()
+    response = await client.get("/tasks", headers=headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_stateless_principal_skips_user_lookup(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "AUTH_STATELESS_PRINCIPAL", True)
+    # The user only exists in the token, so any user lookup would fail with 404
+    user = User(id=str(uuid4()), email="stateless@example.com")
+    headers = {"Authorization": f"Bearer {create_test_token(user)}"}
+
+    response = await client.get("/tasks", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["items"] == []
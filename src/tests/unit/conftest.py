@@ -13,7 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from main import app
 from src.core.config import settings
 from src.db.base import Base
-from src.db.session import get_db
+from src.db.session import get_db, get_sessionmaker
 from src.modules.auth.service import TokenPayload
 from src.modules.users.model import User
 
@@ -121,6 +121,9 @@ async def client(db: AsyncSession):
         yield db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_sessionmaker] = lambda: async_sessionmaker(
+        db.bind, class_=AsyncSession, expire_on_commit=False
+    )
 
     transport = ASGITransport(app=app)
     async with AsyncClient(
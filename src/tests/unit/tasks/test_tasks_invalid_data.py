@@ -68,3 +68,161 @@ async def test_invalid_data_delete_task(db_task: Task, client: AsyncClient):
     headers = {"Authorization": f"Bearer {token}"}
     response = await client.delete("/tasks/12", headers=headers)
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_get_tasks(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get(
+        "/tasks", params={"cursor": "not-a-cursor"}, headers=headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_invalid_data_create_tasks_in_bulk(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post(
+        "/tasks/bulk", json=[{"title": "Valid"}, {"title": " "}], headers=headers
+    )
+    assert response.status_code == 422
+
+    empty_response = await client.post("/tasks/bulk", json=[], headers=headers)
+    assert empty_response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_invalid_data_update_tasks_in_bulk(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.patch(
+        "/tasks/bulk", json={"ids": [str(db_task.id)]}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_duplicate_title_create_task(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post(
+        "/tasks", json={"title": db_task.title}, headers=headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_duplicate_title_update_task(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post("/tasks", json={"title": "Other"}, headers=headers)
+    response = await client.put(
+        f"/tasks/{response.json()['id']}",
+        json={"title": db_task.title},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_stale_etag_update_and_delete_task(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get(f"/tasks/{db_task.id}", headers=headers)
+    stale_headers = {**headers, "If-Match": response.headers["ETag"]}
+    await client.put(
+        f"/tasks/{db_task.id}", json={"status": "COMPLETED"}, headers=headers
+    )
+
+    response = await client.put(
+        f"/tasks/{db_task.id}", json={"title": "Lost update"}, headers=stale_headers
+    )
+    assert response.status_code == 412
+
+    response = await client.delete(f"/tasks/{db_task.id}", headers=stale_headers)
+    assert response.status_code == 412
+
+
+@pytest.mark.asyncio
+async def test_weak_etag_update_task(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get(f"/tasks/{db_task.id}", headers=headers)
+    weak_headers = {**headers, "If-Match": f"W/{response.headers['ETag']}"}
+
+    response = await client.put(
+        f"/tasks/{db_task.id}", json={"title": "Weakly matched"}, headers=weak_headers
+    )
+    assert response.status_code == 412
+
+
+@pytest.mark.asyncio
+async def test_invalid_sync_token_get_task_changes(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get(
+        "/tasks/changes", params={"since": "not-a-token"}, headers=headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_invalid_format_export_tasks(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get(
+        "/tasks/export", params={"format": "xml"}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_invalid_rows_import_tasks(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    body = "title,description\nOnly title\n ,blank title\n"
+    response = await client.post(
+        "/tasks/import", params={"format": "csv"}, content=body, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "inserted": 0,
+        "duplicates": 0,
+        "invalid": 2,
+        "errors": [
+            {"line": 2, "detail": "Expected 2 fields, got 1"},
+            {"line": 3, "detail": "title: Value error, Title must not be empty"},
+        ],
+    }
+
+    response = await client.post("/tasks/import", content=b"\xff\xfe", headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_invalid_search_tasks(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get("/tasks/search", params={"q": ""}, headers=headers)
+    assert response.status_code == 422
+
+    response = await client.get(
+        "/tasks/search", params={"q": "task", "cursor": "bad"}, headers=headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_invalid_filters_get_tasks(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    for params in [{"status": "DONE"}, {"sort": "id"}, {"created_after": "soon"}]:
+        response = await client.get("/tasks", params=params, headers=headers)
+        assert response.status_code == 422
+
+    response = await client.get(
+        "/tasks", params={"sort": "title", "cursor": "WyJ4IiwieSJd"}, headers=headers
+    )
+    assert response.status_code == 400
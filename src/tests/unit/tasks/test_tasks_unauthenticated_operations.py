@@ -58,3 +58,23 @@ async def test_delete_task(db_task: Task, client: AsyncClient):
 
     no_headers_response = await client.delete(f"/tasks/{db_task.id}", headers=headers)
     assert no_headers_response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_stream_task_events(client: AsyncClient):
+    headers = {"Authorization": "Bearer invalid_token"}
+    response = await client.get("/tasks/stream", headers=headers)
+    assert response.status_code == 403
+
+    no_headers_response = await client.get("/tasks/stream")
+    assert no_headers_response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_get_task_stats(client: AsyncClient):
+    headers = {"Authorization": "Bearer invalid_token"}
+    response = await client.get("/tasks/stats", headers=headers)
+    assert response.status_code == 403
+
+    no_headers_response = await client.get("/tasks/stats")
+    assert no_headers_response.status_code == 403
@@ -1,11 +1,27 @@
+import asyncio
+import csv
+import json
+from typing import Any
+
 import pytest
 from httpx import AsyncClient
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
-from src.modules.tasks.model import Task
+from src.common.pagination import encode_cursor
+from src.core.audit import AuditPipeline, audit_pipeline
+from src.core.config import settings
+from src.core.logging import logger
+from src.core.profiling import Sampler
+from src.core.tracing import span_exporter
+from src.modules.auth.service import Principal
+from src.modules.tasks.cache import task_cache, task_list_cache
+from src.modules.tasks.events import TaskEventBroker, task_event_broker
+from src.modules.tasks.model import CURRENT_XACT_ID, Task, task_revision_seq
+from src.modules.tasks.repository import TaskRepository
+from src.modules.tasks.service import TaskService
 from src.modules.users.model import User
-from src.tests.unit.conftest import create_test_token
+from src.tests.unit.conftest import create_test_token, db_url
 
 
 @pytest.mark.asyncio
@@ -97,3 +113,882 @@ async def test_delete_task(db_task: Task, client: AsyncClient):
     response = await client.delete(f"/tasks/{db_task.id}", headers=headers)
 
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_with_cursor(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(3):
+        await client.post("/tasks", json={"title": f"Task {i}"}, headers=headers)
+
+    response = await client.get(
+        "/tasks", params={"cursor": "", "page_size": 2}, headers=headers
+    )
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [task["title"] for task in first_page["items"]] == ["Task 0", "Task 1"]
+    assert first_page["next_cursor"] is not None
+
+    response = await client.get(
+        "/tasks",
+        params={"cursor": first_page["next_cursor"], "page_size": 2},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert [task["title"] for task in second_page["items"]] == ["Task 2"]
+    assert second_page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_without_total(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get(
+        "/tasks", params={"include_total": False}, headers=headers
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["items"]) == 1
+    assert data["total"] is None
+    assert data["total_pages"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_estimated_total(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get(
+        "/tasks", params={"count_mode": "estimated"}, headers=headers
+    )
+
+    assert response.status_code == 200
+    assert isinstance(response.json()["total"], int)
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_total_follows_writes(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/tasks", headers=headers)
+    assert response.json()["total"] == 1
+
+    await client.post("/tasks", json={"title": "Other"}, headers=headers)
+    response = await client.get("/tasks", headers=headers)
+    assert response.json()["total"] == 2
+
+    await client.delete(f"/tasks/{db_task.id}", headers=headers)
+    response = await client.get("/tasks", headers=headers)
+    assert response.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_total_follows_writes_of_other_workers(
+    db_task: Task, db: AsyncSession, client: AsyncClient
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/tasks", headers=headers)
+    assert response.json()["total"] == 1
+
+    # Written without this worker's service, as another worker would
+    db.add(Task(title="Elsewhere", user_id=db_task.user_id))
+    await db.commit()
+    response = await client.get("/tasks", headers=headers)
+    assert response.json()["total"] == 2
+    response = await client.get("/tasks", params={"status": "PENDING"}, headers=headers)
+    assert response.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_exact_total_in_one_query(db_task: Task, db: AsyncSession):
+    repository = TaskRepository(db=db)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        tasks, total = await repository.get_all(
+            user_id=db_task.user_id, page=1, page_size=10
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert [task.id for task in tasks] == [db_task.id]
+    assert total == 1
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_past_last_page(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/tasks", params={"page": 3}, headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["items"] == []
+    assert data["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_in_bulk(
+    db_task: Task, db: AsyncSession, client: AsyncClient
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post(
+        "/tasks/bulk",
+        json=[
+            {"title": "First"},
+            {"title": db_task.title},
+            {"title": "Second", "description": "Details"},
+            {"title": "First"},
+        ],
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["duplicates"] == 2
+    assert [item["status"] for item in data["items"]] == [
+        "CREATED",
+        "DUPLICATE",
+        "CREATED",
+        "DUPLICATE",
+    ]
+    assert data["items"][2]["task"]["description"] == "Details"
+
+    result = await db.execute(select(Task).filter(Task.user_id == db_task.user_id))
+    assert len(result.scalars().all()) == 3
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_in_bulk(
+    db_task: Task, another_db_task: Task, client: AsyncClient
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.patch(
+        "/tasks/bulk",
+        json={"ids": [str(db_task.id), str(another_db_task.id)], "status": "COMPLETED"},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [task["id"] for task in data["items"]] == [str(db_task.id)]
+    assert data["items"][0]["status"] == "COMPLETED"
+    assert data["missing_ids"] == [str(another_db_task.id)]
+
+    response = await client.get(f"/tasks/{db_task.id}", headers=headers)
+    assert response.json()["status"] == "COMPLETED"
+
+
+@pytest.mark.asyncio
+async def test_delete_tasks_in_bulk(
+    db_task: Task, another_db_task: Task, db: AsyncSession, client: AsyncClient
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.request(
+        "DELETE",
+        "/tasks/bulk",
+        json={"ids": [str(db_task.id), str(another_db_task.id)]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "deleted_ids": [str(db_task.id)],
+        "missing_ids": [str(another_db_task.id)],
+    }
+    result = await db.execute(select(Task))
+    assert [task.id for task in result.scalars().all()] == [another_db_task.id]
+
+
+@pytest.mark.asyncio
+async def test_get_task_served_from_cache(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    hits = task_cache.backend.stats()["hits"]
+
+    await client.get(f"/tasks/{db_task.id}", headers=headers)
+    response = await client.get(f"/tasks/{db_task.id}", headers=headers)
+    assert response.status_code == 200
+    assert task_cache.backend.stats()["hits"] == hits + 1
+
+    await client.put(
+        f"/tasks/{db_task.id}", json={"status": "COMPLETED"}, headers=headers
+    )
+    response = await client.get(f"/tasks/{db_task.id}", headers=headers)
+    assert response.json()["status"] == "COMPLETED"
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_served_from_cache(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    hits = task_list_cache.backend.stats()["hits"]
+
+    first_response = await client.get("/tasks", headers=headers)
+    second_response = await client.get("/tasks", headers=headers)
+    assert second_response.content == first_response.content
+    assert task_list_cache.backend.stats()["hits"] == hits + 1
+
+    await client.post("/tasks", json={"title": "Other"}, headers=headers)
+    response = await client.get("/tasks", headers=headers)
+    assert len(response.json()["items"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_task(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get(f"/tasks/{db_task.id}", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await client.get(
+        f"/tasks/{db_task.id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await client.put(
+        f"/tasks/{db_task.id}", json={"status": "COMPLETED"}, headers=headers
+    )
+    assert response.headers["ETag"] != etag
+
+    response = await client.get(
+        f"/tasks/{db_task.id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_tasks(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/tasks", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await client.get("/tasks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    await client.post("/tasks", json={"title": "Other"}, headers=headers)
+    response = await client.get("/tasks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_update_task_with_matching_etag(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get(f"/tasks/{db_task.id}", headers=headers)
+
+    response = await client.put(
+        f"/tasks/{db_task.id}",
+        json={"title": "New Title Task"},
+        headers={**headers, "If-Match": response.headers["ETag"]},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "New Title Task"
+
+
+@pytest.mark.asyncio
+async def test_get_task_changes(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/tasks/changes", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [change["id"] for change in data["changes"]] == [str(db_task.id)]
+    assert data["has_more"] is False
+    sync_token = data["next_token"]
+
+    response = await client.post("/tasks", json={"title": "Other"}, headers=headers)
+    other_id = response.json()["id"]
+    await client.delete(f"/tasks/{db_task.id}", headers=headers)
+
+    response = await client.get(
+        "/tasks/changes", params={"since": sync_token, "limit": 1}, headers=headers
+    )
+    data = response.json()
+    assert data["has_more"] is True
+    assert data["changes"][0]["id"] == other_id
+    assert data["changes"][0]["task"]["title"] == "Other"
+
+    response = await client.get(
+        "/tasks/changes", params={"since": data["next_token"]}, headers=headers
+    )
+    data = response.json()
+    assert data["has_more"] is False
+    assert data["changes"] == [{"id": str(db_task.id), "deleted": True, "task": None}]
+
+
+@pytest.mark.asyncio
+async def test_revision_sync_token_restarts_task_changes(
+    db_task: Task, client: AsyncClient
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    revision_token = encode_cursor([db_task.revision])
+
+    response = await client.get(
+        "/tasks/changes", params={"since": revision_token}, headers=headers
+    )
+    assert response.status_code == 200
+    assert [change["id"] for change in response.json()["changes"]] == [str(db_task.id)]
+
+
+@pytest.mark.asyncio
+async def test_task_changes_wait_for_earlier_writes_to_commit(
+    db_task: Task, client: AsyncClient
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get("/tasks/changes", headers=headers)
+    sync_token = response.json()["next_token"]
+
+    # Another worker's transaction draws the lower id first but commits last. It
+    # writes after the fast one commits, as writes of a user wait for each other.
+    other_engine = create_async_engine(db_url)
+    async with AsyncSession(other_engine) as other:
+        await other.execute(select(CURRENT_XACT_ID))
+        response = await client.post("/tasks", json={"title": "Fast"}, headers=headers)
+        fast_id = response.json()["id"]
+        await other.execute(
+            update(Task)
+            .where(Task.id == db_task.id)
+            .values(
+                title="Slow",
+                revision=task_revision_seq.next_value(),
+                xact_id=CURRENT_XACT_ID,
+            )
+        )
+
+        response = await client.get(
+            "/tasks/changes", params={"since": sync_token}, headers=headers
+        )
+        data = response.json()
+        ids = [change["id"] for change in data["changes"]]
+        sync_token = data["next_token"]
+        await other.commit()
+    await other_engine.dispose()
+
+    response = await client.get(
+        "/tasks/changes", params={"since": sync_token}, headers=headers
+    )
+    ids += [change["id"] for change in response.json()["changes"]]
+    assert sorted(ids) == sorted([fast_id, str(db_task.id)])
+
+
+@pytest.mark.asyncio
+async def test_task_read_racing_a_write_is_not_cached(
+    db_task: Task, db: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    repository = TaskRepository(db=db)
+    service = TaskService(repository=repository)
+    user = Principal(id=db_task.user_id, email=db_task.owner.email)
+    get_by_id = repository.get_by_id
+    reads = 0
+
+    async def counted_get_by_id(**kwargs):
+        nonlocal reads
+        reads += 1
+        result = await get_by_id(**kwargs)
+        if reads == 1:
+            # A write served by this worker finishes while the task is loaded
+            await service.cache.invalidate(user.id, db_task.id)
+        return result
+
+    monkeypatch.setattr(repository, "get_by_id", counted_get_by_id)
+    for _ in range(3):
+        await service.get_by_id(user=user, task_id=db_task.id)
+
+    # The first read predates the write; the second is cached for the third
+    assert reads == 2
+
+
+@pytest.mark.asyncio
+async def test_task_listing_racing_a_write_is_not_reused(
+    db_task: Task, db: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    repository = TaskRepository(db=db)
+    service = TaskService(repository=repository)
+    user = Principal(id=db_task.user_id, email=db_task.owner.email)
+    get_all = repository.get_all
+    listings = 0
+
+    async def counted_get_all(**kwargs):
+        nonlocal listings
+        listings += 1
+        result = await get_all(**kwargs)
+        if listings == 1:
+            # A write finishes while the listing is built
+            db.add(Task(title="Elsewhere", user_id=user.id))
+            await db.commit()
+        return result
+
+    monkeypatch.setattr(repository, "get_all", counted_get_all)
+    for _ in range(3):
+        await service.get_listing(
+            user=user, page=1, page_size=10, cursor=None, count_mode=None
+        )
+
+    # The first listing predates the write; the second is cached for the third
+    assert listings == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_task_events(
+    db_task: Task, another_db_task: Task, db: AsyncSession, client: AsyncClient
+):
+    broker = TaskEventBroker(
+        dsn=task_event_broker.dsn, channel=task_event_broker.channel, queue_size=10
+    )
+    service = TaskService(repository=TaskRepository(db=db), events=broker)
+    user = Principal(id=db_task.user_id, email=db_task.owner.email)
+    events = await service.stream_events(user=user)
+    headers = {"Authorization": f"Bearer {create_test_token(db_task.owner)}"}
+    other_headers = {
+        "Authorization": f"Bearer {create_test_token(another_db_task.owner)}"
+    }
+    try:
+        await client.post("/tasks", json={"title": "Other"}, headers=other_headers)
+        response = await client.put(
+            f"/tasks/{db_task.id}", json={"title": "Renamed"}, headers=headers
+        )
+        frame = await asyncio.wait_for(anext(events), timeout=5)
+        event, data = frame.strip().split("\n")
+        assert event == "event: update"
+        assert json.loads(data.removeprefix("data: ")) == {
+            "id": str(db_task.id),
+            "revision": int(response.headers["ETag"].strip('"')),
+        }
+
+        response = await client.post(
+            "/tasks", json={"title": "Second"}, headers=headers
+        )
+        second_id = response.json()["id"]
+        frame = await asyncio.wait_for(anext(events), timeout=5)
+        assert frame.startswith("event: create\n")
+
+        # One statement updating both tasks sends an event for each
+        await client.patch(
+            "/tasks/bulk",
+            json={"ids": [str(db_task.id), second_id], "status": "COMPLETED"},
+            headers=headers,
+        )
+        updated = set()
+        for _ in range(2):
+            frame = await asyncio.wait_for(anext(events), timeout=5)
+            event, data = frame.strip().split("\n")
+            assert event == "event: update"
+            updated.add(json.loads(data.removeprefix("data: "))["id"])
+        assert updated == {str(db_task.id), second_id}
+
+        await client.delete(f"/tasks/{db_task.id}", headers=headers)
+        frame = await asyncio.wait_for(anext(events), timeout=5)
+        assert frame.startswith("event: delete\n")
+    finally:
+        await events.aclose()
+        await broker.stop()
+    assert broker.subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_task_events_asks_to_resync_after_lost_events(
+    db_task: Task, db: AsyncSession, client: AsyncClient
+):
+    broker = TaskEventBroker(
+        dsn=task_event_broker.dsn, channel=task_event_broker.channel, queue_size=1
+    )
+    service = TaskService(repository=TaskRepository(db=db), events=broker)
+    user = Principal(id=db_task.user_id, email=db_task.owner.email)
+    events = await service.stream_events(user=user)
+    headers = {"Authorization": f"Bearer {create_test_token(db_task.owner)}"}
+    try:
+        # Two changes arrive before the client reads the first one
+        notification: dict[str, Any] = {
+            "user_id": str(db_task.user_id),
+            "op": "update",
+            "tasks": [[str(db_task.id), 1], [str(db_task.id), 2]],
+        }
+        broker._on_notify(None, 0, broker.channel, json.dumps(notification))
+        frame = await asyncio.wait_for(anext(events), timeout=5)
+        assert frame == "event: resync\ndata: {}\n\n"
+        assert broker.dropped == 2
+
+        # Statements changing too many tasks do not list them
+        notification["tasks"] = None
+        broker._on_notify(None, 0, broker.channel, json.dumps(notification))
+        frame = await asyncio.wait_for(anext(events), timeout=5)
+        assert frame == "event: resync\ndata: {}\n\n"
+
+        # Changes made while the listener reconnects are lost as well
+        assert broker._connection is not None
+        await broker._connection.close()
+        frame = await asyncio.wait_for(anext(events), timeout=5)
+        assert frame == "event: resync\ndata: {}\n\n"
+
+        await client.put(
+            f"/tasks/{db_task.id}", json={"title": "Renamed"}, headers=headers
+        )
+        frame = await asyncio.wait_for(anext(events), timeout=5)
+        assert frame.startswith("event: update\n")
+    finally:
+        await events.aclose()
+        await broker.stop()
+
+
+@pytest.mark.asyncio
+async def test_export_tasks(
+    db_task: Task, another_db_task: Task, db: AsyncSession, client: AsyncClient
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post("/tasks", json={"title": "Second, with comma"}, headers=headers)
+
+    response = await client.get("/tasks/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    tasks = [json.loads(line) for line in response.text.splitlines()]
+    assert [task["title"] for task in tasks] == ["Test Task", "Second, with comma"]
+    assert tasks[0]["id"] == str(db_task.id)
+
+    response = await client.get(
+        "/tasks/export", params={"format": "csv"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert [row["title"] for row in rows] == ["Test Task", "Second, with comma"]
+    assert rows[0]["status"] == "PENDING"
+    # The export reads through its own session and leaves the request's one open
+    assert db_task in db
+
+
+@pytest.mark.asyncio
+async def test_import_tasks(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    body = "\n".join(
+        [
+            json.dumps({"title": "Imported", "description": "From NDJSON"}),
+            json.dumps({"title": "Test Task"}),
+            "",
+            json.dumps({"title": "Imported"}),
+            "not json",
+            json.dumps({"description": "No title"}),
+        ]
+    )
+
+    response = await client.post("/tasks/import", content=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "inserted": 1,
+        "duplicates": 2,
+        "invalid": 2,
+        "errors": [
+            {"line": 5, "detail": "Invalid JSON"},
+            {"line": 6, "detail": "title: Field required"},
+        ],
+    }
+
+    body = 'title,description\n"Multi, line","first\nsecond"\nNo description,\n'
+    response = await client.post(
+        "/tasks/import", params={"format": "csv"}, content=body, headers=headers
+    )
+    assert response.json()["inserted"] == 2
+
+    response = await client.get("/tasks/export", headers=headers)
+    tasks = [json.loads(line) for line in response.text.splitlines()]
+    assert {(task["title"], task["description"]) for task in tasks} == {
+        ("Test Task", "Test Task Description"),
+        ("Imported", "From NDJSON"),
+        ("Multi, line", "first\nsecond"),
+        ("No description", None),
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_tasks(db_task: Task, another_db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post(
+        "/tasks",
+        json={"title": "Buy groceries", "description": "Milk and task lists"},
+        headers=headers,
+    )
+    await client.post("/tasks", json={"title": "Walk the dog"}, headers=headers)
+
+    response = await client.get(
+        "/tasks/search", params={"q": "tasks", "page_size": 1}, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    # Title matches rank above description matches
+    assert [task["title"] for task in data["items"]] == ["Test Task"]
+
+    response = await client.get(
+        "/tasks/search",
+        params={"q": "tasks", "page_size": 1, "cursor": data["next_cursor"]},
+        headers=headers,
+    )
+    data = response.json()
+    assert [task["title"] for task in data["items"]] == ["Buy groceries"]
+    assert data["next_cursor"] is None
+
+    response = await client.get(
+        "/tasks/search", params={"q": "task -milk"}, headers=headers
+    )
+    assert [task["title"] for task in response.json()["items"]] == ["Test Task"]
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_filtered_and_sorted(db_user: User, client: AsyncClient):
+    token = create_test_token(db_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    for title in ["Charlie", "Alpha", "Delta", "Bravo"]:
+        response = await client.post("/tasks", json={"title": title}, headers=headers)
+        if title in ("Charlie", "Delta"):
+            await client.put(
+                f"/tasks/{response.json()['id']}",
+                json={"status": "COMPLETED"},
+                headers=headers,
+            )
+
+    response = await client.get(
+        "/tasks",
+        params={"status": "PENDING", "sort": "title", "direction": "desc"},
+        headers=headers,
+    )
+    data = response.json()
+    assert [task["title"] for task in data["items"]] == ["Bravo", "Alpha"]
+    assert data["total"] == 2
+
+    params: dict[str, str | int] = {
+        "status": "COMPLETED",
+        "sort": "title",
+        "page_size": 1,
+        "cursor": "",
+    }
+    response = await client.get("/tasks", params=params, headers=headers)
+    data = response.json()
+    assert [task["title"] for task in data["items"]] == ["Charlie"]
+
+    params["cursor"] = data["next_cursor"]
+    response = await client.get("/tasks", params=params, headers=headers)
+    data = response.json()
+    assert [task["title"] for task in data["items"]] == ["Delta"]
+    assert data["next_cursor"] is None
+
+    response = await client.get(
+        "/tasks", params={"created_before": "2000-01-01T00:00:00Z"}, headers=headers
+    )
+    assert response.json()["total"] == 0
+
+    # The unfiltered total is unaffected by the filtered listings above
+    response = await client.get("/tasks", params={"direction": "desc"}, headers=headers)
+    data = response.json()
+    assert [task["title"] for task in data["items"]][0] == "Bravo"
+    assert data["total"] == 4
+
+
+@pytest.mark.asyncio
+async def test_get_task_stats(
+    db_task: Task, another_db_task: Task, client: AsyncClient
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/tasks/stats", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 1,
+        "by_status": {"PENDING": 1, "COMPLETED": 0},
+    }
+
+    response = await client.post(
+        "/tasks/bulk", json=[{"title": "One"}, {"title": "Two"}], headers=headers
+    )
+    ids = [item["task"]["id"] for item in response.json()["items"]]
+    await client.patch(
+        "/tasks/bulk", json={"ids": ids, "status": "COMPLETED"}, headers=headers
+    )
+    await client.delete(f"/tasks/{ids[0]}", headers=headers)
+
+    response = await client.get("/tasks/stats", headers=headers)
+    assert response.json() == {
+        "total": 2,
+        "by_status": {"PENDING": 1, "COMPLETED": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_task_operations_are_audited(
+    db_task: Task, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    messages: list[str] = []
+    handler = logger.add(
+        messages.append,
+        format="{message}",
+        filter=lambda record: "AUDIT" in record["extra"],
+    )
+    try:
+        audit_pipeline.flush()
+        messages.clear()
+        monkeypatch.setattr(audit_pipeline, "read_sample_rate", 0.0)
+        sampled_out = audit_pipeline.sampled_out
+
+        await client.get(f"/tasks/{db_task.id}", headers=headers)
+        await client.put(
+            f"/tasks/{db_task.id}", json={"title": "Audited"}, headers=headers
+        )
+        assert audit_pipeline.pending == 1
+        assert audit_pipeline.sampled_out == sampled_out + 1
+
+        audit_pipeline.flush()
+    finally:
+        logger.remove(handler)
+    (record,) = [json.loads(line) for line in "".join(messages).splitlines()]
+    assert record["action"] == "task.update"
+    assert record["actor"] == str(db_task.user_id)
+    assert record["task_id"] == str(db_task.id)
+
+    pipeline = AuditPipeline(
+        buffer_size=2, batch_size=10, flush_interval=1, read_sample_rate=1
+    )
+    for action in ["first", "second", "third"]:
+        pipeline.record(action, None)
+    assert pipeline.stats()["dropped"] == 1
+    assert pipeline.pending == 2
+
+
+@pytest.mark.asyncio
+async def test_task_requests_are_measured(db_task: Task, client: AsyncClient):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    await client.get(f"/tasks/{db_task.id}", headers=headers)
+    await client.get(f"/tasks/{db_task.id}", headers=headers)
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert (
+        'http_requests_total{method="GET",route="/tasks/{task_id}",status="200"}'
+        in body
+    )
+    assert str(db_task.id) not in body
+    assert 'cache_lookups_total{cache="tasks",result="hit"}' in body
+    assert 'cache_entries{cache="auth_tokens"}' in body
+    assert "db_pool_connections" in body
+    assert 'audit_records_total{outcome="recorded"}' in body
+
+
+@pytest.mark.asyncio
+async def test_task_request_is_profiled_on_demand(
+    db_task: Task, client: AsyncClient, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+    if Sampler is not None:
+        monkeypatch.setattr(settings, "PROFILING_FLAMEGRAPH_DIR", str(tmp_path))
+
+    response = await client.get(f"/tasks/{db_task.id}", headers=headers)
+    assert "server-timing" not in response.headers
+
+    response = await client.get(
+        f"/tasks/{db_task.id}", headers={**headers, "X-Profile": "wrong"}
+    )
+    assert "server-timing" not in response.headers
+
+    # Sent as raw bytes, which the server decodes as latin-1
+    raw_headers = {b"Authorization": f"Bearer {token}".encode()}
+    response = await client.get(
+        f"/tasks/{db_task.id}",
+        headers={**raw_headers, b"X-Profile": "sécret".encode()},
+    )
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+
+    response = await client.get(
+        f"/tasks/{db_task.id}", headers={**headers, "X-Profile": "secret"}
+    )
+    assert response.status_code == 200
+    metrics = {
+        metric.split(";")[0] for metric in response.headers["server-timing"].split(", ")
+    }
+    assert {
+        "deps",
+        "get_current_principal",
+        "get_task_service",
+        "endpoint",
+        "serialize",
+        "total",
+    } <= metrics
+    if Sampler is not None:
+        (flamegraph,) = tmp_path.iterdir()
+        assert "-GET-tasks_task_id-" in flamegraph.name
+
+
+@pytest.mark.asyncio
+async def test_task_request_is_traced(
+    db_task: Task, client: AsyncClient, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    token = create_test_token(db_task.owner)
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(span_exporter, "exporter", "file")
+    monkeypatch.setattr(span_exporter, "file_path", str(tmp_path / "traces.jsonl"))
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    parent_id = "00f067aa0ba902b7"
+
+    await client.get(
+        f"/tasks/{db_task.id}",
+        headers={**headers, "traceparent": f"00-{trace_id}-{parent_id}-01"},
+    )
+    await client.get(
+        f"/tasks/{db_task.id}",
+        headers={**headers, "traceparent": f"00-{'1' * 32}-{parent_id}-00"},
+    )
+    await span_exporter.flush()
+
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    spans = {
+        span["name"]: span
+        for line in lines
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    }
+    assert {span["traceId"] for span in spans.values()} == {trace_id}
+    server = spans["GET /tasks/{task_id}"]
+    assert server["parentSpanId"] == parent_id
+    assert server["kind"] == 2
+    service = spans["TaskService.get_by_id"]
+    assert service["parentSpanId"] == server["spanId"]
+    assert spans["TaskRepository.get_by_id"]["parentSpanId"] == service["spanId"]